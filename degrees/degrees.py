@@ -1,31 +1,97 @@
+import argparse
 import csv
+import json
+import mmap
+import os
+import pickle
+import struct
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
-
-# Maps names to a set of corresponding person_ids
+import threading
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from parallel import PARALLEL_THRESHOLD, ParallelSearch
+from tables import open_tables, table_sections
+
+# Maps names to a set of corresponding person_ids. Loaded from a snapshot,
+# these tables are read-only views of the mapped file rather than dicts
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
 movies = {}
 
+# Dense integer index for every person_id and movie_id, in both directions
+person_ids = []
+person_index = {}
+movie_ids = []
+movie_index = {}
+
+# Co-star graph in compressed sparse row form: the co-stars of person p
+# are costars[offsets[p]:offsets[p + 1]], and costar_movies holds the
+# index of the movie each pair starred in together
+offsets = array("i")
+costars = array("i")
+costar_movies = array("i")
+
+# Prefix and fuzzy lookup over names, built on first use
+name_index = None
+name_index_lock = threading.Lock()
+
+# How to pick one person when a name matches several: "ask" prompts,
+# "most-connected" and "earliest-birth" pick automatically, "none" gives up
+DISAMBIGUATION_POLICIES = ("ask", "most-connected", "earliest-birth", "none")
+disambiguation = "ask"
+
+# Landmark distance index, if one has been built for the loaded data
+landmark_index = None
+INDEX_FILE = "landmarks.index"
+
+# Multi-process search engine, if one has been started
+parallel_search = None
+
+# Binary snapshot of the loaded data, written next to the CSV files
+SNAPSHOT_FILE = "degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP\0"
+SNAPSHOT_VERSION = 3
+
+# Magic, version, byte lengths of the pickled key and section layout,
+# then a CRC-32 of everything after the header
+SNAPSHOT_HEADER = struct.Struct("<8sIQQI")
+
+# Sections of the snapshot start on multiples of this many bytes
+SNAPSHOT_ALIGNMENT = 8
+
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
+
+    Reuses a binary snapshot of a previous load when the CSV files
+    have not changed since it was written.
     """
+    key = snapshot_key(directory)
+    if load_snapshot(directory, key):
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             people[row["id"]] = {
                 "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+                "birth": row["birth"]
             }
+            person_index[row["id"]] = len(person_ids)
+            person_ids.append(row["id"])
             if row["name"].lower() not in names:
                 names[row["name"].lower()] = {row["id"]}
             else:
@@ -37,31 +103,269 @@ def load_data(directory):
         for row in reader:
             movies[row["id"]] = {
                 "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+                "year": row["year"]
             }
+            movie_index[row["id"]] = len(movie_ids)
+            movie_ids.append(row["id"])
 
     # Load stars
+    cast = [set() for _ in movie_ids]
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                cast[movie_index[row["movie_id"]]].add(
+                    person_index[row["person_id"]]
+                )
             except KeyError:
                 pass
 
+    build_graph(cast)
+    save_snapshot(directory, key)
+
+
+def build_graph(cast):
+    """
+    Fills the co-star arrays from `cast`, a list giving the set of
+    person indices that starred in each movie index.
+    """
+    # Count co-stars per person to size each row
+    degree = [0] * len(person_ids)
+    for stars in cast:
+        for person in stars:
+            degree[person] += len(stars) - 1
+
+    del offsets[:]
+    offsets.append(0)
+    for count in degree:
+        offsets.append(offsets[-1] + count)
+
+    # Fill each row, using a cursor per person
+    del costars[:]
+    del costar_movies[:]
+    costars.extend(array("i", [0]) * offsets[-1])
+    costar_movies.extend(array("i", [0]) * offsets[-1])
+    cursor = array("i", offsets[:-1])
+    for movie, stars in enumerate(cast):
+        for person in stars:
+            for costar in stars:
+                if costar != person:
+                    costars[cursor[person]] = costar
+                    costar_movies[cursor[person]] = movie
+                    cursor[person] += 1
+
+
+def snapshot_key(directory):
+    """
+    Returns a value identifying the CSV files in `directory` by size and
+    modification time, along with the layout of the stored arrays.
+    """
+    key = [SNAPSHOT_VERSION, sys.byteorder, array("i").itemsize]
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        stat = os.stat(f"{directory}/{filename}")
+        key.append((filename, stat.st_size, stat.st_mtime_ns))
+    return tuple(key)
+
+
+def save_snapshot(directory, key):
+    """
+    Writes the loaded data to a snapshot file in `directory`.
+
+    Failing to write the snapshot is not an error; the next run will
+    just parse the CSV files again.
+    """
+    sections = table_sections(people, movies, person_ids, movie_ids)
+    sections["offsets"] = offsets
+    sections["costars"] = costars
+    sections["costar_movies"] = costar_movies
+
+    # Each section starts on an aligned offset from the end of the layout
+    parts = []
+    layout = {}
+    position = 0
+    for name, data in sections.items():
+        view = memoryview(data)
+        parts.append(bytes(-position % SNAPSHOT_ALIGNMENT))
+        position += -position % SNAPSHOT_ALIGNMENT
+        layout[name] = (view.format, position, len(view))
+        parts.append(data)
+        position += view.nbytes
+
+    key_bytes = pickle.dumps(key)
+    layout_bytes = pickle.dumps(layout)
+    padding = bytes(
+        -(SNAPSHOT_HEADER.size + len(key_bytes) + len(layout_bytes))
+        % SNAPSHOT_ALIGNMENT
+    )
+    parts[:0] = [key_bytes, layout_bytes, padding]
+    checksum = 0
+    for part in parts:
+        checksum = zlib.crc32(part, checksum)
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(key_bytes), len(layout_bytes),
+        checksum
+    )
+
+    path = f"{directory}/{SNAPSHOT_FILE}"
+    try:
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(header)
+            for part in parts:
+                f.write(part)
+        os.replace(f"{path}.tmp", path)
+    except OSError:
+        pass
+
+
+def load_snapshot(directory, key):
+    """
+    Loads data from the snapshot file in `directory`, memory-mapping the
+    tables and co-star arrays so they are read in place.
+
+    Returns False if there is no snapshot, it is damaged, or it does not
+    match `key`.
+    """
+    global names, people, movies, person_ids, person_index
+    global movie_ids, movie_index, offsets, costars, costar_movies
+
+    try:
+        with open(f"{directory}/{SNAPSHOT_FILE}", "rb") as f:
+            snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False
+
+    # A damaged or truncated snapshot is treated like a missing one
+    sections = read_snapshot(snapshot, key)
+    if sections is None:
+        snapshot.close()
+        return False
+
+    (names, people, movies, person_ids, person_index,
+     movie_ids, movie_index) = open_tables(sections)
+    offsets = sections["offsets"]
+    costars = sections["costars"]
+    costar_movies = sections["costar_movies"]
+    return True
+
+
+def read_snapshot(snapshot, key):
+    """
+    Returns views of the sections of a mapped snapshot by name, or None
+    if the snapshot is damaged or does not match `key`.
+    """
+    if len(snapshot) < SNAPSHOT_HEADER.size:
+        return None
+    magic, version, key_length, layout_length, checksum = (
+        SNAPSHOT_HEADER.unpack_from(snapshot)
+    )
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    with memoryview(snapshot) as payload:
+        if zlib.crc32(payload[SNAPSHOT_HEADER.size:]) != checksum:
+            return None
+
+    # Past the checksum, anything the pickles raise still means a bad file
+    position = SNAPSHOT_HEADER.size
+    try:
+        if pickle.loads(snapshot[position:position + key_length]) != key:
+            return None
+        position += key_length
+        layout = pickle.loads(snapshot[position:position + layout_length])
+        position += layout_length
+        position += -position % SNAPSHOT_ALIGNMENT
+
+        sections = {}
+        for name, (typecode, start, length) in layout.items():
+            start += position
+            end = start + length * struct.calcsize(typecode)
+            if end > len(snapshot):
+                return None
+            sections[name] = memoryview(snapshot)[start:end].cast(typecode)
+    except Exception:
+        return None
+    return sections
+
+
+def build_index(directory, k):
+    """
+    Builds a landmark index over the `k` most connected people and
+    saves it in `directory`.
+    """
+    global landmark_index
+    landmark_index = LandmarkIndex.build(offsets, costars, k)
+    landmark_index.save(f"{directory}/{INDEX_FILE}", snapshot_key(directory))
+
+
+def load_index(directory):
+    """
+    Loads the landmark index saved in `directory`, if there is one
+    built from the current data.
+    """
+    global landmark_index
+    landmark_index = LandmarkIndex.load(
+        f"{directory}/{INDEX_FILE}", snapshot_key(directory), len(person_ids)
+    )
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    global parallel_search, disambiguation
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", metavar="FILE",
+                      help="answer source,target name pairs from FILE "
+                           "('-' for stdin)")
+    mode.add_argument("--serve", metavar="PORT", type=int,
+                      help="answer GET /path?source=...&target=... "
+                           "on localhost")
+    mode.add_argument("--build-index", metavar="K", type=int,
+                      help="build a distance index over the K most "
+                           "connected people and exit")
+    parser.add_argument("--disambiguate", choices=DISAMBIGUATION_POLICIES,
+                        default="ask",
+                        help="how to resolve names shared by several people")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="threads answering queries")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="expand large search levels across this many "
+                             "processes")
+    args = parser.parse_args()
+    disambiguation = args.disambiguate
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
-
+    print("Loading data...", file=sys.stderr)
+    load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    if args.build_index is not None:
+        build_index(args.directory, args.build_index)
+        print(f"Built index over {args.build_index} landmarks.",
+              file=sys.stderr)
+        return
+    load_index(args.directory)
+
+    if args.processes:
+        parallel_search = ParallelSearch(
+            offsets, costars, costar_movies, args.processes,
+            buffers=min(args.workers, args.processes)
+        )
+    try:
+        if args.batch is not None:
+            run_batch(args.batch, args.workers)
+        elif args.serve is not None:
+            run_server(args.serve, args.workers)
+        else:
+            run_interactive()
+    finally:
+        if parallel_search is not None:
+            parallel_search.close()
+
+
+def run_interactive():
+    """
+    Asks for two names and prints how they are connected.
+    """
     source = person_id_for_name(input("Name: "))
     if source is None:
         sys.exit("Person not found.")
@@ -87,59 +391,350 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
-    i = 0
+def run_batch(filename, workers):
+    """
+    Answers every source,target pair in `filename` (or stdin for "-"),
+    printing one JSON result per line in input order.
+    """
+    # Queries in flight, oldest first, with at most `room` of them
+    # pending so a long or endless input is never read far ahead
+    window = deque()
+    window_lock = threading.Lock()
+    room = threading.Semaphore(workers * 2)
+
+    def flush(_):
+        """Prints the results at the head of the window that are done."""
+        with window_lock:
+            while window and window[0].done():
+                try:
+                    print(json.dumps(window.popleft().result()), flush=True)
+                finally:
+                    room.release()
+
+    def safe_answer(source_name, target_name):
+        """Answers one pair, reporting a failure as that row's error."""
+        try:
+            return answer(source_name, target_name)
+        except Exception as e:
+            return {"source": source_name, "target": target_name,
+                    "error": f"{type(e).__name__}: {e}"}
+
+    f = sys.stdin if filename == "-" else open(filename, encoding="utf-8")
+    try:
+        pairs = (row for row in csv.reader(f) if len(row) >= 2)
+        with ThreadPoolExecutor(workers) as pool:
+            for row in pairs:
+                room.acquire()
+                future = pool.submit(safe_answer, *row[:2])
+                with window_lock:
+                    window.append(future)
+                future.add_done_callback(flush)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    if landmark_index is not None:
+        print(json.dumps(landmark_index.stats()), file=sys.stderr)
+
+
+def run_server(port, workers):
+    """
+    Serves queries over HTTP on localhost until interrupted.
+    """
+    server = QueryServer(("127.0.0.1", port), workers)
+    print(f"Serving on http://127.0.0.1:{port}/path", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
-    #Initialize frontier
-    start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start)
 
-    # Empty explored set
-    explored = set()
+class QueryServer(HTTPServer):
+    """
+    HTTP server handling each request on a fixed pool of threads.
+    """
 
-    while True:
-        i += 1
-        if frontier.empty() or i == 1000:
-            return None
+    def __init__(self, address, workers):
+        super().__init__(address, QueryHandler)
+        self.pool = ThreadPoolExecutor(workers)
 
-        node = frontier.remove()
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
 
-        explored.add(node.state)
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            stats = landmark_index.stats() if landmark_index else {}
+            self.send_json(stats)
+            return
+        if url.path != "/path":
+            self.send_error(404)
+            return
+        params = parse_qs(url.query)
+        if "source" not in params or "target" not in params:
+            self.send_error(400, "source and target are required")
+            return
+
+        self.send_json(answer(params["source"][0], params["target"][0]))
+
+    def send_json(self, result):
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def answer(source_name, target_name):
+    """
+    Returns a JSON-ready result connecting two people given by name.
 
-        for action, state in neighbors_for_person(node.state):
-            if not frontier.contains_state(state) and state not in explored:
-                child = Node(state=state, parent=node, action=action)
-                if state == target:
-                    solution = []
-                    while child.parent is not None:
-                        solution.append([child.action, child.state])
-                        child = child.parent
-                    solution.reverse()
-                    return solution
-                frontier.add(child)
+    Names that match no one, or more than one person when they cannot
+    be disambiguated without asking, are reported in an "error" field
+    instead of a path. The id and full name of the person each name
+    was resolved to are included, which shows any spelling correction.
+    """
+    result = {"source": source_name, "target": target_name}
+    ids = []
+    for role, name in (("source", source_name), ("target", target_name)):
+        person_ids = find_people(name)
+        if not person_ids:
+            result["error"] = f"{name}: not found"
+            result["suggestions"] = get_name_index().prefix(name.strip())
+            return result
+        policy = "none" if disambiguation == "ask" else disambiguation
+        person_id = choose_person(sorted(person_ids), policy)
+        if person_id is None:
+            result["error"] = f"{name}: ambiguous"
+            return result
+        result[f"{role}_id"] = person_id
+        result[f"{role}_name"] = people[person_id]["name"]
+        ids.append(person_id)
+
+    path = shortest_path(*ids)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {"movie": movies[movie_id]["title"],
+             "person": people[person_id]["name"]}
+            for movie_id, person_id in path
+        ]
+    return result
 
 
+def shortest_path(source, target):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    Searches from both ends at once, always expanding one full level
+    of whichever frontier is currently smaller. With a landmark index
+    loaded, paths whose length the index knows exactly come straight
+    from its distance tables instead. With a parallel engine started,
+    large levels are expanded across its worker processes.
     """
+    if source == target:
+        return []
+
+    source = person_index[source]
+    target = person_index[target]
+    distance = None
+    if landmark_index is not None:
+        distance = landmark_index.distance(source, target)
+        if distance == -1:
+            return None
+    if distance is not None:
+        path = landmark_index.path(offsets, costars, costar_movies,
+                                   source, target)
+    elif parallel_search is not None:
+        with parallel_search.session() as session:
+            path = search(source, target, session)
+    else:
+        path = search(source, target)
+    if path is None:
+        return None
+    return [(movie_ids[movie], person_ids[person]) for movie, person in path]
+
 
-    # TODO
-    raise NotImplementedError
+def search(source, target, session=None):
+    """
+    Runs the bidirectional search between two person indices over the
+    co-star arrays, returning (movie, person) index pairs or None.
+    Large levels go to the parallel `session`, if given.
+    """
+    # Each side of the search maps every person index it has reached to
+    # the person it was reached from, the shared movie and the depth
+    forward = new_side(source)
+    backward = new_side(target)
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward, session
+            )
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward, session
+            )
+        if meeting != -1:
+            return build_path(meeting, forward, backward)
+
+    return None
+
+
+def new_side(root):
+    """
+    Returns the visited map for one side of a search rooted at person
+    index `root`, sized to what the search explores rather than to the
+    whole graph.
+    """
+    return {root: (root, -1, 0)}
 
 
-def person_id_for_name(name):
+def expand_level(frontier, side, other_side, session=None):
+    """
+    Expands every person in `frontier` by one step, recording new
+    people in `side`, across the worker processes of a parallel
+    `session` if the frontier is large.
+
+    Returns the next frontier and the person where this side meets the
+    other side of the search on the shortest route, or -1.
+    """
+    next_frontier = []
+    meeting = -1
+    best = -1
+    if session is not None and len(frontier) >= PARALLEL_THRESHOLD:
+        for costar, person, movie in session.expand(frontier, side):
+            if costar in side:
+                continue
+            depth = side[person][2] + 1
+            side[costar] = (person, movie, depth)
+            next_frontier.append(costar)
+            other = other_side.get(costar)
+            if other is not None:
+                length = depth + other[2]
+                if best == -1 or length < best:
+                    best = length
+                    meeting = costar
+        return next_frontier, meeting
+
+    for person in frontier:
+        depth = side[person][2] + 1
+        for edge in range(offsets[person], offsets[person + 1]):
+            costar = costars[edge]
+            if costar in side:
+                continue
+            side[costar] = (person, costar_movies[edge], depth)
+            next_frontier.append(costar)
+            other = other_side.get(costar)
+            if other is not None:
+                length = depth + other[2]
+                if best == -1 or length < best:
+                    best = length
+                    meeting = costar
+    return next_frontier, meeting
+
+
+def build_path(meeting, forward, backward):
+    """
+    Joins the two halves of a bidirectional search at `meeting` into
+    a list of (movie, person) index pairs from source to target.
+    """
+    path = []
+    person = meeting
+    while forward[person][0] != person:
+        parent, movie, _ = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person][0] != person:
+        parent, movie, _ = backward[person]
+        path.append((movie, parent))
+        person = parent
+    return path
+
+
+def person_id_for_name(name, policy=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Names with no exact match fall back to the closest spellings. When
+    several people match, `policy` (by default the module-wide
+    `disambiguation`) decides between them.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = sorted(find_people(name))
     if len(person_ids) == 0:
         return None
-    elif len(person_ids) > 1:
+    person_id = choose_person(person_ids, policy or disambiguation, name)
+    if person_id is not None and (
+        people[person_id]["name"].lower() != name.strip().lower()
+    ):
+        print(f"Using {people[person_id]['name']} for '{name.strip()}'.")
+    return person_id
+
+
+def find_people(name):
+    """
+    Returns the ids of the people called `name`, ignoring case, or of
+    those with the closest spellings if no one is.
+
+    Exact names are looked up directly, so the name index is only
+    built once a name is misspelled.
+    """
+    person_ids = names.get(name.strip().lower())
+    if person_ids:
+        return person_ids
+    return get_name_index().lookup(name.strip())
+
+
+def choose_person(person_ids, policy, name=""):
+    """
+    Returns one of `person_ids` according to a disambiguation policy,
+    or None if none was chosen.
+    """
+    if len(person_ids) == 1:
+        return person_ids[0]
+    elif policy == "most-connected":
+        return max(person_ids, key=lambda person_id: (
+            offsets[person_index[person_id] + 1]
+            - offsets[person_index[person_id]]
+        ))
+    elif policy == "earliest-birth":
+        return min(person_ids, key=lambda person_id: (
+            not people[person_id]["birth"],
+            int(people[person_id]["birth"] or 0)
+        ))
+    elif policy == "ask":
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -152,9 +747,18 @@ def person_id_for_name(name):
                 return person_id
         except ValueError:
             pass
-        return None
-    else:
-        return person_ids[0]
+    return None
+
+
+def get_name_index():
+    """
+    Returns the name index, building it the first time it is needed.
+    """
+    global name_index
+    with name_index_lock:
+        if name_index is None:
+            name_index = NameIndex(names)
+    return name_index
 
 
 def neighbors_for_person(person_id):
@@ -162,11 +766,12 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
+    person = person_index[person_id]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for edge in range(offsets[person], offsets[person + 1]):
+        neighbors.add(
+            (movie_ids[costar_movies[edge]], person_ids[costars[edge]])
+        )
     return neighbors
 
 
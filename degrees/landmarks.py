@@ -0,0 +1,217 @@
+import heapq
+import math
+import os
+import pickle
+import threading
+from array import array
+from collections import deque
+
+INDEX_VERSION = 1
+
+
+def bfs_distances(offsets, costars, source):
+    """
+    Returns an array giving the number of steps from person index
+    `source` to every person, or -1 for people it cannot reach.
+    """
+    distances = array("i", [-1]) * (len(offsets) - 1)
+    distances[source] = 0
+    queue = deque([source])
+    while queue:
+        person = queue.popleft()
+        distance = distances[person] + 1
+        for edge in range(offsets[person], offsets[person + 1]):
+            costar = costars[edge]
+            if distances[costar] == -1:
+                distances[costar] = distance
+                queue.append(costar)
+    return distances
+
+
+class LandmarkIndex():
+    """
+    Distances from a few well-connected landmark people to everyone else.
+
+    Answers distance queries that involve a landmark directly, and bounds
+    any other distance through the triangle inequality, answering it too
+    when the bounds meet.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.position = {
+            person: i for i, person in enumerate(landmarks)
+        }
+
+        # Distance queries answered from the tables or not, counted from
+        # many query threads at once
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, offsets, costars, k):
+        """
+        Builds an index over the `k` people with the most co-stars.
+        """
+        people = range(len(offsets) - 1)
+        landmarks = heapq.nlargest(
+            k, people, key=lambda p: offsets[p + 1] - offsets[p]
+        )
+        distances = [bfs_distances(offsets, costars, landmark)
+                     for landmark in landmarks]
+        return cls(landmarks, distances)
+
+    def save(self, filename, key):
+        """
+        Writes the index to `filename`, tagged with the data `key` it
+        was built from.
+        """
+        with open(f"{filename}.tmp", "wb") as f:
+            pickle.dump((INDEX_VERSION, key, self.landmarks), f)
+            for distances in self.distances:
+                distances.tofile(f)
+        os.replace(f"{filename}.tmp", filename)
+
+    @classmethod
+    def load(cls, filename, key, size):
+        """
+        Reads an index from `filename` covering `size` people.
+
+        Returns None if there is no index or it was built from data
+        other than `key`.
+        """
+        try:
+            with open(filename, "rb") as f:
+                version, index_key, landmarks = pickle.load(f)
+                if version != INDEX_VERSION or index_key != key:
+                    return None
+                distances = []
+                for _ in landmarks:
+                    table = array("i")
+                    table.fromfile(f, size)
+                    distances.append(table)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return None
+        return cls(landmarks, distances)
+
+    def distance(self, source, target):
+        """
+        Returns the exact distance between two people if either is a
+        landmark or the bounds on it meet, -1 if they are known not to
+        be connected, else None.
+        """
+        distance = None
+        for person, other in ((source, target), (target, source)):
+            if person in self.position:
+                distance = self.distances[self.position[person]][other]
+                break
+        else:
+            lower, upper, _ = self.bounds(source, target)
+            if lower == math.inf:
+                distance = -1
+            elif lower == upper:
+                distance = upper
+        with self.lock:
+            if distance is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return distance
+
+    def path(self, offsets, costars, costar_movies, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs from
+        `source` to `target` by walking down landmark distance tables,
+        or None if the distance is not known exactly.
+        """
+        if source in self.position:
+            distances = self.distances[self.position[source]]
+            if distances[target] == -1:
+                return None
+            return reverse(target, self.walk(
+                offsets, costars, costar_movies, distances, target
+            ))
+        if target in self.position:
+            distances = self.distances[self.position[target]]
+            if distances[source] == -1:
+                return None
+            return self.walk(offsets, costars, costar_movies, distances,
+                             source)
+
+        # Otherwise go through a landmark on a shortest route
+        lower, upper, landmark = self.bounds(source, target)
+        if lower == math.inf or lower != upper:
+            return None
+        distances = self.distances[landmark]
+        return self.walk(
+            offsets, costars, costar_movies, distances, source
+        ) + reverse(target, self.walk(
+            offsets, costars, costar_movies, distances, target
+        ))
+
+    def walk(self, offsets, costars, costar_movies, distances, start):
+        """
+        Returns (movie, person) index pairs leading from `start` to the
+        landmark whose table is `distances`, stepping to any co-star one
+        closer to the landmark each time.
+        """
+        path = []
+        person = start
+        while distances[person] > 0:
+            for edge in range(offsets[person], offsets[person + 1]):
+                costar = costars[edge]
+                if distances[costar] == distances[person] - 1:
+                    break
+            path.append((costar_movies[edge], costar))
+            person = costar
+        return path
+
+    def bounds(self, source, target):
+        """
+        Returns lower and upper bounds on the distance between two
+        people, both infinity if they cannot be connected, and the
+        position of a landmark on a route of the upper bound's length.
+        """
+        lower = 0
+        upper = math.inf
+        landmark = None
+        for i, distances in enumerate(self.distances):
+            a = distances[source]
+            b = distances[target]
+            if (a == -1) != (b == -1):
+                return math.inf, math.inf, None
+            if a == -1:
+                continue
+            if abs(a - b) > lower:
+                lower = abs(a - b)
+            if a + b < upper:
+                upper = a + b
+                landmark = i
+        return lower, upper, landmark
+
+    def stats(self):
+        """
+        Returns counts of distance queries answered from the index.
+        """
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "landmarks": len(self.landmarks),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0
+        }
+
+
+def reverse(start, path):
+    """
+    Reverses a list of (movie, person) pairs leading away from `start`
+    into one leading back to it.
+    """
+    people = [start] + [person for _, person in path]
+    return [
+        (path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)
+    ]
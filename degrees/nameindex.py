@@ -0,0 +1,188 @@
+from bisect import bisect_left
+
+# Largest edit distance between a query and a fuzzy match
+MAX_DISTANCE = 2
+
+
+def deletions(word):
+    """
+    Returns the word itself and every way of deleting one character.
+    """
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the edit distance between `a` and `b`, counting adjacent
+    transpositions as one edit, or `limit` + 1 once it exceeds `limit`.
+
+    Only cells within `limit` of the diagonal can stay within the limit,
+    so only those are computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if a == b:
+        return 0
+    over = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        for j in range(low, high + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1,
+                        current[j - 1] + 1,
+                        previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current[low - 1:high + 1]) > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+def within_one_edit(a, b):
+    """
+    Returns True if `a` and `b` are at most one edit apart, counting an
+    adjacent transposition as one edit.
+    """
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if a == b:
+        return True
+
+    # Skip the common prefix, then the rest must match after one edit
+    i = 0
+    while i < len(a) and i < len(b) and a[i] == b[i]:
+        i += 1
+    if len(a) > len(b):
+        return a[i + 1:] == b[i:]
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (
+        i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i]
+        and a[i + 2:] == b[i + 2:]
+    )
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant lookup over lowercase names.
+
+    Names are kept sorted for prefix search. Fuzzy search goes through
+    the words of each name: every word is indexed under each of its
+    one-character deletions, which finds words within one edit of a
+    query word, and the names containing them are then checked in full.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.sorted_names = sorted(names)
+
+        # Maps each word to the names containing it, and each one-deletion
+        # variant of a word to the words it came from
+        self.postings = {}
+        self.variants = {}
+        for name in self.sorted_names:
+            for word in set(name.split()):
+                if word not in self.postings:
+                    self.postings[word] = []
+                    for variant in deletions(word):
+                        self.variants.setdefault(variant, []).append(word)
+                self.postings[word].append(name)
+
+    def exact(self, name):
+        """
+        Returns the set of ids for a name, ignoring case.
+        """
+        return self.names.get(name.lower(), set())
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.sorted_names, prefix)
+        while (i < len(self.sorted_names) and len(matches) < limit
+               and self.sorted_names[i].startswith(prefix)):
+            matches.append(self.sorted_names[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, name, limit=10, max_distance=MAX_DISTANCE):
+        """
+        Returns up to `limit` names within `max_distance` edits of `name`,
+        closest first.
+        """
+        return [
+            candidate
+            for _, candidate in self.closest(name, limit, max_distance)
+        ]
+
+    def closest(self, name, limit=10, max_distance=MAX_DISTANCE):
+        """
+        Returns up to `limit` (distance, name) pairs for the names within
+        `max_distance` edits of `name`, closest first.
+        """
+        name = name.lower()
+        words = name.split()
+        if not words:
+            return []
+
+        # Any word of the query, typo included, leads to the right names,
+        # so gather candidates through the one with the fewest postings
+        candidates = None
+        for word in words:
+            similar = self.similar_words(word)
+            if not similar:
+                continue
+            if candidates is None or (
+                sum(len(self.postings[w]) for w in similar)
+                < sum(len(self.postings[w]) for w in candidates)
+            ):
+                candidates = similar
+        if candidates is None:
+            return []
+
+        matches = []
+        for word in candidates:
+            for candidate in self.postings[word]:
+                distance = edit_distance(name, candidate, max_distance)
+                if distance <= max_distance:
+                    matches.append((distance, candidate))
+        return sorted(set(matches))[:limit]
+
+    def similar_words(self, word):
+        """
+        Returns indexed words within one edit of `word`.
+        """
+        similar = set()
+        for variant in deletions(word):
+            for candidate in self.variants.get(variant, ()):
+                if within_one_edit(word, candidate):
+                    similar.add(candidate)
+        return similar
+
+    def lookup(self, name):
+        """
+        Returns the set of ids for a name, falling back to the closest
+        fuzzy matches when there is no exact match.
+        """
+        person_ids = self.exact(name)
+        if person_ids:
+            return person_ids
+        matches = self.closest(name)
+        if not matches:
+            return set()
+        best = matches[0][0]
+        return set().union(*(
+            self.names[match] for distance, match in matches
+            if distance == best
+        ))
@@ -0,0 +1,202 @@
+import itertools
+import os
+import queue
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+# Frontiers smaller than this are expanded in the calling process
+PARALLEL_THRESHOLD = 2048
+
+ITEMSIZE = array("i").itemsize
+
+# Largest stamp a visited buffer holds before it is cleared and reused
+MAX_STAMP = 2 ** 31 - 1
+
+# Views onto the shared graph and visited buffers, set up in each worker
+# process, and the shared memory blocks they point into
+graph = {}
+blocks = []
+
+
+def attach(names, lengths):
+    """
+    Maps the shared graph arrays and visited buffers into a worker
+    process.
+    """
+    for key in ("offsets", "costars", "costar_movies"):
+        block = shared_memory.SharedMemory(name=names[key])
+        graph[key] = block.buf[:ITEMSIZE * lengths[key]].cast("i")
+        blocks.append(block)
+    graph["visited"] = []
+    for name in names["visited"]:
+        block = shared_memory.SharedMemory(name=name)
+        graph["visited"].append(
+            block.buf[:ITEMSIZE * lengths["visited"]].cast("i")
+        )
+        blocks.append(block)
+
+
+def expand_chunk(chunk, buffer, stamp):
+    """
+    Returns (costar, person, movie) triples for every co-star of the
+    people in `chunk` not stamped with `stamp` in visited buffer
+    `buffer`, one triple per new co-star.
+    """
+    return expand(chunk, graph["offsets"], graph["costars"],
+                  graph["costar_movies"], graph["visited"][buffer], stamp)
+
+
+def expand(chunk, offsets, costars, costar_movies, visited, stamp):
+    found = {}
+    for person in chunk:
+        for edge in range(offsets[person], offsets[person + 1]):
+            costar = costars[edge]
+            if visited[costar] != stamp and costar not in found:
+                found[costar] = (costar, person, costar_movies[edge])
+    return list(found.values())
+
+
+class ParallelSearch():
+    """
+    Expands large levels of a breadth-first search across a pool of
+    processes sharing the co-star arrays.
+
+    Each search in progress holds one of a few shared visited buffers,
+    in which it stamps the people it has reached so workers can skip
+    them. Stamps grow with every search, so buffers are never cleared
+    between searches, and searches holding different buffers run at the
+    same time.
+    """
+
+    def __init__(self, offsets, costars, costar_movies, workers=None,
+                 buffers=None):
+        self.workers = workers or os.cpu_count()
+        self.size = len(offsets) - 1
+        self.blocks = {}
+        for key, values in (("offsets", offsets),
+                            ("costars", costars),
+                            ("costar_movies", costar_movies)):
+            data = memoryview(values).cast("B")
+            block = shared_memory.SharedMemory(
+                create=True, size=max(len(data), 1)
+            )
+            block.buf[:len(data)] = data
+            self.blocks[key] = block
+        self.visited_blocks = [
+            shared_memory.SharedMemory(
+                create=True, size=max(ITEMSIZE * self.size, 1)
+            )
+            for _ in range(buffers or self.workers)
+        ]
+
+        self.offsets = self.view(self.blocks["offsets"], len(offsets))
+        self.costars = self.view(self.blocks["costars"], len(costars))
+        self.costar_movies = self.view(self.blocks["costar_movies"],
+                                       len(costar_movies))
+        self.visited = [self.view(block, self.size)
+                        for block in self.visited_blocks]
+
+        # Buffers free for a search to take, with the last stamp used
+        self.free = queue.Queue()
+        for buffer in range(len(self.visited)):
+            self.free.put((buffer, 0))
+
+        names = {key: block.name for key, block in self.blocks.items()}
+        names["visited"] = [block.name for block in self.visited_blocks]
+        lengths = {
+            "offsets": len(offsets),
+            "costars": len(costars),
+            "costar_movies": len(costar_movies),
+            "visited": self.size
+        }
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=attach, initargs=(names, lengths)
+        )
+
+    def view(self, block, length):
+        return block.buf[:ITEMSIZE * length].cast("i")
+
+    @contextmanager
+    def session(self):
+        """
+        Yields a Session holding a visited buffer for one search, or None
+        if every buffer is in use, in which case the search runs in the
+        calling process.
+        """
+        try:
+            buffer, stamp = self.free.get_nowait()
+        except queue.Empty:
+            yield None
+            return
+        if stamp > MAX_STAMP - 2:
+            self.visited[buffer][:] = array("i", [0]) * self.size
+            stamp = 0
+        session = Session(self, buffer, stamp)
+        try:
+            yield session
+        finally:
+            self.free.put((buffer, session.stamp))
+
+    def close(self):
+        """
+        Stops the worker processes and frees the shared memory.
+        """
+        self.pool.shutdown()
+        self.offsets.release()
+        self.costars.release()
+        self.costar_movies.release()
+        for view in self.visited:
+            view.release()
+        for block in itertools.chain(self.blocks.values(),
+                                     self.visited_blocks):
+            block.close()
+            block.unlink()
+
+
+class Session():
+    """
+    One search's use of a ParallelSearch, stamping each side of the
+    search into its visited buffer with a stamp of its own.
+    """
+
+    def __init__(self, engine, buffer, stamp):
+        self.engine = engine
+        self.buffer = buffer
+        self.stamp = stamp
+
+        # Per side of the search: its stamp, and how many of the people
+        # it has reached are stamped so far
+        self.sides = {}
+
+    def expand(self, frontier, side):
+        """
+        Returns candidate (costar, person, movie) triples one step out
+        from `frontier`, skipping people already in `side`, a dict
+        whose keys are the people that side of the search has reached.
+        """
+        engine = self.engine
+        if id(side) not in self.sides:
+            self.stamp += 1
+            self.sides[id(side)] = (self.stamp, 0)
+        stamp, stamped = self.sides[id(side)]
+
+        # Stamp everyone the side reached since it last went parallel.
+        # A person reached by both sides keeps the later stamp, which
+        # only means workers may return them again
+        visited = engine.visited[self.buffer]
+        for person in itertools.islice(side, stamped, None):
+            visited[person] = stamp
+        self.sides[id(side)] = (stamp, len(side))
+
+        size = -(-len(frontier) // engine.workers)
+        chunks = [frontier[i:i + size]
+                  for i in range(0, len(frontier), size)]
+        candidates = []
+        for found in engine.pool.map(
+            expand_chunk, chunks, itertools.repeat(self.buffer),
+            itertools.repeat(stamp)
+        ):
+            candidates.extend(found)
+        return candidates
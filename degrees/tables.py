@@ -0,0 +1,177 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+
+
+def pack_strings(strings):
+    """
+    Returns `strings` encoded as one UTF-8 blob, and an array of the
+    offsets where each string starts, ending with the blob's length.
+    """
+    blob = bytearray()
+    starts = array("q", [0])
+    for string in strings:
+        blob += string.encode("utf-8")
+        starts.append(len(blob))
+    return bytes(blob), starts
+
+
+class StringTable(Sequence):
+    """
+    Strings read on demand from a UTF-8 blob and their start offsets,
+    which may both be views into a mapped file.
+    """
+
+    def __init__(self, blob, starts):
+        self.blob = blob
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.blob[self.starts[i]:self.starts[i + 1]], "utf-8")
+
+
+class IndexTable(Mapping):
+    """
+    Maps each id in a StringTable to its position there, by binary
+    search over `order`, the positions sorted by id.
+    """
+
+    def __init__(self, ids, order):
+        self.ids = ids
+        self.order = order
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            raise KeyError(key)
+        i = bisect_left(range(len(self.order)), key,
+                        key=lambda j: self.ids[self.order[j]])
+        if i == len(self.order) or self.ids[self.order[i]] != key:
+            raise KeyError(key)
+        return self.order[i]
+
+
+class RecordTable(Mapping):
+    """
+    Maps ids to a dictionary of fields, each field a StringTable in the
+    same order as the ids.
+    """
+
+    def __init__(self, index, fields):
+        self.index = index
+        self.fields = fields
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __getitem__(self, key):
+        i = self.index[key]
+        return {field: values[i] for field, values in self.fields.items()}
+
+
+class NameTable(Mapping):
+    """
+    Maps lowercase names to the set of ids of the people with that name,
+    by binary search over `order`, the positions sorted by lowercase name.
+    """
+
+    def __init__(self, ids, people_names, order):
+        self.ids = ids
+        self.people_names = people_names
+        self.order = order
+        self.length = None
+
+    def name(self, j):
+        return self.people_names[self.order[j]].lower()
+
+    def __len__(self):
+        if self.length is None:
+            self.length = sum(1 for _ in self)
+        return self.length
+
+    def __iter__(self):
+        previous = None
+        for j in range(len(self.order)):
+            name = self.name(j)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            raise KeyError(key)
+        positions = range(len(self.order))
+        start = bisect_left(positions, key, key=self.name)
+        end = bisect_right(positions, key, lo=start, key=self.name)
+        if start == end:
+            raise KeyError(key)
+        return {self.ids[self.order[j]] for j in range(start, end)}
+
+
+def table_sections(people, movies, person_ids, movie_ids):
+    """
+    Returns the id, name and record tables as a dictionary of named blobs
+    and arrays that `open_tables` can read back in place.
+    """
+    sections = {}
+    for prefix, records, ids, fields in (
+        ("person", people, person_ids, ("name", "birth")),
+        ("movie", movies, movie_ids, ("title", "year"))
+    ):
+        columns = {"id": ids}
+        for field in fields:
+            columns[field] = [records[i][field] for i in ids]
+        for column, strings in columns.items():
+            (sections[f"{prefix}_{column}"],
+             sections[f"{prefix}_{column}_starts"]) = pack_strings(strings)
+        sections[f"{prefix}_order"] = array(
+            "i", sorted(range(len(ids)), key=ids.__getitem__)
+        )
+    lowered = [people[i]["name"].lower() for i in person_ids]
+    sections["name_order"] = array(
+        "i", sorted(range(len(person_ids)), key=lowered.__getitem__)
+    )
+    return sections
+
+
+def open_tables(sections):
+    """
+    Returns (names, people, movies, person_ids, person_index, movie_ids,
+    movie_index) read from `sections`, as written by `table_sections`.
+    """
+    def strings(name):
+        return StringTable(sections[name], sections[f"{name}_starts"])
+
+    person_ids = strings("person_id")
+    person_index = IndexTable(person_ids, sections["person_order"])
+    people = RecordTable(person_index, {
+        "name": strings("person_name"),
+        "birth": strings("person_birth")
+    })
+    movie_ids = strings("movie_id")
+    movie_index = IndexTable(movie_ids, sections["movie_order"])
+    movies = RecordTable(movie_index, {
+        "title": strings("movie_title"),
+        "year": strings("movie_year")
+    })
+    names = NameTable(person_ids, people.fields["name"],
+                      sections["name_order"])
+    return (names, people, movies, person_ids, person_index,
+            movie_ids, movie_index)
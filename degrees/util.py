@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Counts how many nodes in the frontier hold each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +29,16 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard_state(node.state)
             return node
 
+    def discard_state(self, state):
+        if self.states[state] == 1:
+            del self.states[state]
+        else:
+            self.states[state] -= 1
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +46,6 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard_state(node.state)
             return node
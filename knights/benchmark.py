@@ -0,0 +1,96 @@
+"""
+Benchmark the entailment backends on generated knights and knaves puzzles
+
+Usage: python benchmark.py [--sizes N,...] [--statements M] [--trials T]
+                           [--seed S]
+"""
+
+import argparse
+import time
+
+from generator import generate
+from logic import *
+
+# (name, function returning the entailed symbols, most symbols it is run on)
+BACKENDS = [
+    ("recursive", lambda knowledge, symbols: [
+        symbol for symbol in symbols if recursive_check(knowledge, symbol)
+    ], 14),
+    ("compiled", lambda knowledge, symbols: [
+        symbol for symbol in symbols if compiled_check(knowledge, symbol)
+    ], 14),
+    ("truthtable", lambda knowledge, symbols: [
+        symbol for symbol in symbols if truth_table_check(knowledge, symbol)
+    ], 22),
+    ("sat", lambda knowledge, symbols: [
+        symbol for symbol in symbols if sat_check(knowledge, symbol)
+    ], None),
+    ("parallel", lambda knowledge, symbols: [
+        symbol for symbol in symbols if parallel_check(knowledge, symbol)
+    ], 22),
+    ("model_check", lambda knowledge, symbols: [
+        symbol for symbol in symbols if model_check(knowledge, symbol)
+    ], None),
+    ("entailed", entailed_symbols, None),
+]
+
+
+def run(sizes, statements, trials, seed):
+    """
+    Solves `trials` puzzles of each size with every backend that handles
+    it, checking the backends agree, and prints the mean time per puzzle
+    along with how much it grew from the previous size.
+    """
+    print(f"{'backend':<12} {'chars':>5} {'symbols':>7} {'ms':>10} "
+          f"{'growth':>7}")
+    for name, solve, limit in BACKENDS:
+        previous = None
+        for characters in sizes:
+            if limit is not None and 2 * characters > limit:
+                break
+            elapsed = 0.0
+            for trial in range(trials):
+                knowledge, symbols, solution = generate(
+                    characters, statements * characters,
+                    seed=seed * 1000003 + characters * 1009 + trial
+                )
+                started = time.perf_counter()
+                entailed = solve(knowledge, symbols)
+                elapsed += time.perf_counter() - started
+
+                # Whatever is entailed must hold in the hidden roles
+                if not all(solution[symbol.name] for symbol in entailed):
+                    raise AssertionError(
+                        f"{name} entailed a false symbol with "
+                        f"{characters} characters"
+                    )
+                expected = entailed_symbols(knowledge, symbols)
+                if entailed != expected:
+                    raise AssertionError(
+                        f"{name} disagrees with entailed_symbols with "
+                        f"{characters} characters"
+                    )
+            mean = elapsed / trials
+            growth = f"{mean / previous:.2f}x" if previous else "-"
+            print(f"{name:<12} {characters:>5} {2 * characters:>7} "
+                  f"{mean * 1000:>10.2f} {growth:>7}")
+            previous = mean
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="2,3,4,5,6,7,8,10,12,16,24,32",
+                        help="comma-separated numbers of characters")
+    parser.add_argument("--statements", type=int, default=1,
+                        help="statements per character")
+    parser.add_argument("--trials", type=int, default=3,
+                        help="puzzles generated per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    run(sizes, args.statements, args.trials, args.seed)
+
+
+if __name__ == "__main__":
+    main()
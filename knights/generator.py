@@ -0,0 +1,61 @@
+import random
+import string
+
+from logic import *
+
+
+def character_names(n):
+    """Returns n character names: A to Z, then C27, C28, ..."""
+    return [
+        string.ascii_uppercase[i] if i < 26 else f"C{i + 1}"
+        for i in range(n)
+    ]
+
+
+def generate(characters, statements, seed=None, depth=2):
+    """Returns a random knights and knaves puzzle as (knowledge, symbols,
+    solution): the knowledge base, every Knight and Knave symbol, and a
+    model of the hidden roles, which the knowledge base always allows."""
+    rng = random.Random(seed)
+    names = character_names(characters)
+    knights = {name: Symbol(f"{name} is a Knight") for name in names}
+    knaves = {name: Symbol(f"{name} is a Knave") for name in names}
+
+    # Pick the hidden roles first so the puzzle is satisfiable
+    roles = {name: rng.random() < 0.5 for name in names}
+    solution = {}
+    for name in names:
+        solution[knights[name].name] = roles[name]
+        solution[knaves[name].name] = not roles[name]
+
+    knowledge = []
+    for name in names:
+        knowledge.append(Or(knights[name], knaves[name]))
+        knowledge.append(Not(And(knights[name], knaves[name])))
+
+    def claim(level):
+        """Returns a random statement about the characters."""
+        if level == 0 or rng.random() < 0.3:
+            name = rng.choice(names)
+            return rng.choice([knights[name], knaves[name]])
+        kind = rng.randrange(4)
+        if kind == 0:
+            return Not(claim(level - 1))
+        if kind == 1:
+            return And(claim(level - 1), claim(level - 1))
+        if kind == 2:
+            return Or(claim(level - 1), claim(level - 1))
+        return Biconditional(claim(level - 1), claim(level - 1))
+
+    for _ in range(statements):
+        speaker = rng.choice(names)
+        sentence = claim(depth)
+
+        # Knights only say true things and knaves only false ones
+        if sentence.evaluate(solution) != roles[speaker]:
+            sentence = Not(sentence)
+        knowledge.append(Biconditional(knights[speaker], sentence))
+
+    symbols = [symbol for name in names
+               for symbol in (knights[name], knaves[name])]
+    return And(*knowledge), symbols, solution
@@ -1,7 +1,67 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import sat
+except ImportError:
+    sat = None
+
+# Knowledge bases with more symbols than this are checked with the SAT
+# solver, or failing that across processes, instead of by evaluating
+# every model in one go; benchmark.py puts the crossover between 16
+# and 18 symbols
+ENUMERATION_LIMIT = 16
+
+# Most symbols a parallel worker evaluates at once as a truth table
+TABLE_BITS = 16
+
+# Set in parallel workers once any of them finds a countermodel
+cancelled = None
+
+# Every live sentence, keyed by its class and parts, so that building an
+# equal sentence again returns the existing one
+interned = weakref.WeakValueDictionary()
 
 
 class Sentence():
+    """
+    Immutable, interned logical sentence. Each sentence stores its hash
+    and the set of symbols it mentions when it is first built.
+    """
+
+    __slots__ = ("hash", "symbol_set", "__weakref__")
+
+    @classmethod
+    def intern(cls, **parts):
+        """Returns the sentence of this class with these parts, building it
+        only if no equal sentence exists."""
+        key = (cls,) + tuple(parts.values())
+        sentence = interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in parts.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "hash", hash(sentence.hash_key()))
+            object.__setattr__(sentence, "symbol_set", sentence.find_symbols())
+            interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self.hash
+
+    def hash_key(self):
+        """Returns the value whose hash is the sentence's hash."""
+        raise Exception("nothing to hash")
+
+    def find_symbols(self):
+        """Returns a frozenset of all symbols, computed once when built."""
+        return frozenset()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +73,27 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set)
+
+    def to_cnf(self):
+        """Returns a CNF that is satisfiable exactly when the sentence is."""
+        cnf = CNF()
+        cnf.add([cnf.encode(self)])
+        return cnf
+
+    def tseitin(self, cnf):
+        """Adds clauses defining the sentence to cnf, returning its literal."""
+        raise Exception("nothing to encode")
+
+    def compile(self, index):
+        """Returns a function evaluating the sentence on a model given as an
+        integer, where bit index[name] holds the value of each symbol."""
+        raise Exception("nothing to compile")
+
+    def truth_table(self, columns, full):
+        """Returns an integer whose bit m is the sentence's value in model m,
+        given each symbol's column of values and a mask of all models."""
+        raise Exception("nothing to tabulate")
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +124,21 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        return cls.intern(name=name)
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("symbol", self.name)
 
     def __repr__(self):
         return self.name
@@ -65,20 +152,42 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def find_symbols(self):
+        return frozenset([self.name])
+
+    def tseitin(self, cnf):
+        return cnf.variable(self.name)
+
+    def compile(self, index):
+        bit = 1 << index[self.name]
+        return lambda model: model & bit != 0
+
+    def truth_table(self, columns, full):
+        return columns[self.name]
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+
+        # Double negations cancel out
+        if isinstance(operand, Not):
+            return operand.operand
+        return cls.intern(operand=operand)
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
         return isinstance(other, Not) and self.operand == other.operand
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("not", hash(self.operand))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +198,39 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def find_symbols(self):
+        return self.operand.symbol_set
+
+    def tseitin(self, cnf):
+        return -cnf.encode(self.operand)
+
+    def compile(self, index):
+        operand = self.operand.compile(index)
+        return lambda model: not operand(model)
+
+    def truth_table(self, columns, full):
+        return ~self.operand.truth_table(columns, full) & full
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        return cls.intern(conjuncts=flatten(And, conjuncts, "conjuncts"))
+
+    def __reduce__(self):
+        return (And, self.conjuncts)
 
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -113,10 +238,6 @@ class And(Sentence):
         )
         return f"And({conjunctions})"
 
-    def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
-
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
@@ -126,23 +247,49 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def find_symbols(self):
+        return frozenset().union(
+            *[conjunct.symbol_set for conjunct in self.conjuncts]
+        )
+
+    def tseitin(self, cnf):
+        literals = [cnf.encode(conjunct) for conjunct in self.conjuncts]
+        a = cnf.new_variable()
+        for literal in literals:
+            cnf.add([-a, literal])
+        cnf.add([a] + [-literal for literal in literals])
+        return a
+
+    def compile(self, index):
+        conjuncts = [conjunct.compile(index) for conjunct in self.conjuncts]
+        return lambda model: all(conjunct(model) for conjunct in conjuncts)
+
+    def truth_table(self, columns, full):
+        table = full
+        for conjunct in self.conjuncts:
+            table &= conjunct.truth_table(columns, full)
+        return table
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.intern(disjuncts=flatten(Or, disjuncts, "disjuncts"))
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __eq__(self, other):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +304,51 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def find_symbols(self):
+        return frozenset().union(
+            *[disjunct.symbol_set for disjunct in self.disjuncts]
+        )
+
+    def tseitin(self, cnf):
+        literals = [cnf.encode(disjunct) for disjunct in self.disjuncts]
+        a = cnf.new_variable()
+        for literal in literals:
+            cnf.add([a, -literal])
+        cnf.add([-a] + literals)
+        return a
+
+    def compile(self, index):
+        disjuncts = [disjunct.compile(index) for disjunct in self.disjuncts]
+        return lambda model: any(disjunct(model) for disjunct in disjuncts)
+
+    def truth_table(self, columns, full):
+        table = 0
+        for disjunct in self.disjuncts:
+            table |= disjunct.truth_table(columns, full)
+        return table
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern(antecedent=antecedent, consequent=consequent)
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("implies", hash(self.antecedent), hash(self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +362,50 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def find_symbols(self):
+        return self.antecedent.symbol_set | self.consequent.symbol_set
+
+    def tseitin(self, cnf):
+        p = cnf.encode(self.antecedent)
+        q = cnf.encode(self.consequent)
+        a = cnf.new_variable()
+        cnf.add([-a, -p, q])
+        cnf.add([a, p])
+        cnf.add([a, -q])
+        return a
+
+    def compile(self, index):
+        antecedent = self.antecedent.compile(index)
+        consequent = self.consequent.compile(index)
+        return lambda model: not antecedent(model) or consequent(model)
+
+    def truth_table(self, columns, full):
+        antecedent = self.antecedent.truth_table(columns, full)
+        consequent = self.consequent.truth_table(columns, full)
+        return (~antecedent | consequent) & full
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern(left=left, right=right)
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    __hash__ = Sentence.__hash__
+
+    def hash_key(self):
+        return ("biconditional", hash(self.left), hash(self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,13 +421,275 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def find_symbols(self):
+        return self.left.symbol_set | self.right.symbol_set
+
+    def tseitin(self, cnf):
+        p = cnf.encode(self.left)
+        q = cnf.encode(self.right)
+        a = cnf.new_variable()
+        cnf.add([-a, -p, q])
+        cnf.add([-a, p, -q])
+        cnf.add([a, p, q])
+        cnf.add([a, -p, -q])
+        return a
+
+    def compile(self, index):
+        left = self.left.compile(index)
+        right = self.right.compile(index)
+        return lambda model: left(model) == right(model)
+
+    def truth_table(self, columns, full):
+        left = self.left.truth_table(columns, full)
+        right = self.right.truth_table(columns, full)
+        return ~(left ^ right) & full
+
+
+def flatten(cls, sentences, attribute):
+    """Returns sentences as a tuple with any nested sentences of class cls
+    spliced in place and repeats dropped."""
+    flat = []
+    for sentence in sentences:
+        if isinstance(sentence, cls):
+            flat.extend(getattr(sentence, attribute))
+        else:
+            flat.append(sentence)
+    return tuple(dict.fromkeys(flat))
+
+
+class CNF():
+    """
+    Clauses over integer variables, built by Tseitin encoding sentences:
+    each compound sentence gets a fresh variable defined to be
+    equivalent to it, so the clauses grow linearly with the sentence.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.clauses = []
+
+        # Maps symbol names to their variables, and sentences already
+        # encoded to their literals
+        self.variables = {}
+        self.literals = {}
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def encode(self, sentence):
+        """Returns the literal for sentence, encoding it if needed."""
+        Sentence.validate(sentence)
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.tseitin(self)
+        return self.literals[sentence]
+
+    def add(self, clause):
+        self.clauses.append(clause)
+
+    def solve(self):
+        """Returns a satisfying model over symbol names, or None."""
+        solution = sat.solve(self.count, self.clauses)
+        if solution is None:
+            return None
+        return {
+            name: solution[variable]
+            for name, variable in self.variables.items()
+        }
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query: KB ∧ ¬query is unsatisfiable."""
+    cnf = CNF()
+    cnf.add([cnf.encode(knowledge)])
+    cnf.add([-cnf.encode(query)])
+    return cnf.solve() is None
+
+
+def symbol_columns(symbols):
+    """Returns each symbol's column of values across all 2^n models, as an
+    integer with bit m set when the symbol is true in model m, and the
+    mask of all models."""
+    n = len(symbols)
+    full = (1 << (1 << n)) - 1
+    columns = {}
+    for i, symbol in enumerate(symbols):
+
+        # Runs of 2^i false models then 2^i true models, repeated
+        column = ((1 << (1 << i)) - 1) << (1 << i)
+        width = 1 << (i + 1)
+        while width < 1 << n:
+            column |= column << width
+            width <<= 1
+        columns[symbol] = column & full
+    return columns, full
+
+
+def truth_table_check(knowledge, query):
+    """Checks if knowledge base entails query by evaluating both in every
+    model at once, one bit per model."""
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    columns, full = symbol_columns(symbols)
+    knowledge_table = knowledge.truth_table(columns, full)
+    query_table = query.truth_table(columns, full)
+    return knowledge_table & ~query_table == 0
+
+
+def compiled_check(knowledge, query):
+    """Checks if knowledge base entails query by running compiled
+    sentences over every model in turn."""
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    knowledge = knowledge.compile(index)
+    query = query.compile(index)
+    return all(
+        query(model) for model in range(1 << len(symbols))
+        if knowledge(model)
+    )
+
+
+def entailed_symbols(knowledge, candidates):
+    """Returns the candidates that knowledge base entails, in order,
+    checking all of them in a single pass."""
+    symbols = set(knowledge.symbol_set).union(
+        *[candidate.symbol_set for candidate in candidates]
+    )
+    if len(symbols) > ENUMERATION_LIMIT:
+        if sat is None:
+            return parallel_entailed(knowledge, candidates)
+        return sat_backbone(knowledge, candidates)
+
+    # Each candidate is entailed if it holds in every model of the KB
+    columns, full = symbol_columns(sorted(symbols))
+    knowledge_table = knowledge.truth_table(columns, full)
+    return [
+        candidate for candidate in candidates
+        if knowledge_table & ~candidate.truth_table(columns, full) == 0
+    ]
+
+
+def sat_backbone(knowledge, candidates):
+    """Returns the candidates that knowledge base entails, in order, using
+    one incremental SAT solver: each model found rules out the candidates
+    it falsifies, then a clause asks for a model falsifying one of the
+    rest, until no such model exists."""
+    cnf = CNF()
+    cnf.add([cnf.encode(knowledge)])
+    literals = {candidate: cnf.encode(candidate) for candidate in candidates}
+    solver = sat.Solver(cnf.count, cnf.clauses)
+
+    remaining = list(dict.fromkeys(candidates))
+    while remaining:
+        model = solver.solve()
+        if model is None:
+            break
+        remaining = [
+            candidate for candidate in remaining
+            if model[abs(literals[candidate])] == (literals[candidate] > 0)
+        ]
+        if remaining:
+            solver.add_clause([-literals[candidate] for candidate in remaining])
+
+    entailed = set(remaining)
+    return [candidate for candidate in candidates if candidate in entailed]
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
+    # Large knowledge bases go to the SAT solver if there is one, the rest
+    # are evaluated in every model at once
+    if len(set.union(knowledge.symbols(), query.symbols())) > ENUMERATION_LIMIT:
+        if sat is None:
+            return parallel_check(knowledge, query)
+        return sat_check(knowledge, query)
+    return truth_table_check(knowledge, query)
+
+
+def parallel_check(knowledge, query, workers=None, split=None):
+    """Checks if knowledge base entails query by fixing the first split
+    symbols every possible way and checking the 2^split parts in a
+    process pool, stopping as soon as any part has a countermodel."""
+    return bool(parallel_entailed(knowledge, [query], workers, split))
+
+
+def parallel_entailed(knowledge, candidates, workers=None, split=None):
+    """Returns the candidates that knowledge base entails, in order,
+    splitting the models into parts as parallel_check does and keeping
+    the candidates that hold throughout every part."""
+    symbols = sorted(set(knowledge.symbol_set).union(
+        *[candidate.symbol_set for candidate in candidates]
+    ))
+    workers = workers or os.cpu_count()
+    if split is None:
+        split = (4 * workers - 1).bit_length()
+    split = min(split, len(symbols))
+
+    remaining = set(range(len(candidates)))
+    event = multiprocessing.Event()
+    with ProcessPoolExecutor(workers, initializer=set_cancelled,
+                             initargs=(event,)) as pool:
+        futures = [
+            pool.submit(check_part, knowledge, candidates, symbols, {
+                symbol: bool(part >> i & 1)
+                for i, symbol in enumerate(symbols[:split])
+            })
+            for part in range(1 << split)
+        ]
+        for future in as_completed(futures):
+            remaining.intersection_update(future.result())
+            if not remaining:
+                event.set()
+                for other in futures:
+                    other.cancel()
+                break
+    return [
+        candidate for i, candidate in enumerate(candidates) if i in remaining
+    ]
+
+
+def set_cancelled(event):
+    """Shares the cancellation event with a parallel worker."""
+    global cancelled
+    cancelled = event
+
+
+def check_part(knowledge, queries, symbols, fixed):
+    """Returns the indices of the queries that hold in every model of the
+    knowledge base agreeing with the fixed symbol values, evaluating the
+    knowledge base once per truth table and giving up if cancelled."""
+    free = [symbol for symbol in symbols if symbol not in fixed]
+    inner = free[:TABLE_BITS]
+    outer = free[TABLE_BITS:]
+    columns, full = symbol_columns(inner)
+    for symbol, value in fixed.items():
+        columns[symbol] = full if value else 0
+    surviving = list(range(len(queries)))
+    for assignment in range(1 << len(outer)):
+        if cancelled is not None and cancelled.is_set():
+            return surviving
+        for i, symbol in enumerate(outer):
+            columns[symbol] = full if assignment >> i & 1 else 0
+        knowledge_table = knowledge.truth_table(columns, full)
+        surviving = [
+            i for i in surviving
+            if not knowledge_table & ~queries[i].truth_table(columns, full)
+        ]
+        if not surviving:
+            if cancelled is not None:
+                cancelled.set()
+            return surviving
+    return surviving
+
+
+def recursive_check(knowledge, query):
+    """Checks if knowledge base entails query, one model at a time."""
+
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
@@ -0,0 +1,238 @@
+"""
+Conflict-driven clause learning SAT solver
+
+Variables are positive integers and a literal is a variable or its
+negation. A clause is a list of literals, and a formula in conjunctive
+normal form is a list of clauses.
+"""
+
+
+class Solver():
+    """
+    DPLL search with unit propagation over two watched literals per
+    clause, first-UIP clause learning and non-chronological backjumping.
+    """
+
+    def __init__(self, count, clauses):
+        self.count = count
+
+        # Per variable: 1 true, -1 false, 0 unassigned; the decision level
+        # it was assigned at; and the clause that forced it, if any
+        self.assignment = [0] * (count + 1)
+        self.level = [0] * (count + 1)
+        self.reason = [None] * (count + 1)
+
+        # Branching heuristic: variables in recent conflicts go first,
+        # taking the value they last had
+        self.activity = [0.0] * (count + 1)
+        self.increment = 1.0
+        self.phase = [-1] * (count + 1)
+
+        # Assigned literals in order, where each decision level starts,
+        # and how far propagation has got through them
+        self.trail = []
+        self.levels = []
+        self.head = 0
+
+        # Maps each literal to the clauses watching it
+        self.watches = {}
+        self.unsatisfiable = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause at decision level 0. Between calls to solve(), this
+        keeps everything learned so far for the next call.
+        """
+        self.backjump(0)
+
+        # Recheck level 0 from the start in case the clause is already unit
+        self.head = 0
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            if not self.enqueue(clause[0], None):
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def value(self, literal):
+        value = self.assignment[abs(literal)]
+        return value if literal > 0 else -value
+
+    def enqueue(self, literal, reason):
+        """
+        Makes `literal` true, returning False if it is already false.
+        """
+        value = self.value(literal)
+        if value:
+            return value == 1
+        variable = abs(literal)
+        self.assignment[variable] = 1 if literal > 0 else -1
+        self.level[variable] = len(self.levels)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+        return True
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses, returning a clause
+        with all literals false if there is a conflict, else None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            conflict = None
+            for i, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if not self.enqueue(clause[0], clause):
+                        conflict = clause
+                        kept.extend(watching[i + 1:])
+                        break
+            self.watches[false] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns a learned clause asserting the negation of the first
+        unique implication point, and the level to backjump to.
+        """
+        current = len(self.levels)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen:
+                    continue
+                if self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.level[variable] == current:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Step back to the most recent literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+        learned[0] = -literal
+
+        if len(learned) == 1:
+            return learned, 0
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: self.level[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def backjump(self, level):
+        """
+        Undoes every assignment made above decision `level`.
+        """
+        if len(self.levels) <= level:
+            return
+        start = self.levels[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = self.assignment[variable]
+            self.assignment[variable] = 0
+            self.reason[variable] = None
+        del self.trail[start:]
+        del self.levels[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """
+        Returns the literal to branch on next, or None if every variable
+        is assigned.
+        """
+        best = None
+        for variable in range(1, self.count + 1):
+            if not self.assignment[variable] and (
+                best is None or self.activity[variable] > self.activity[best]
+            ):
+                best = variable
+        if best is None:
+            return None
+        return best if self.phase[best] == 1 else -best
+
+    def solve(self):
+        """
+        Returns a satisfying assignment as a dict from variable to bool,
+        or None if the clauses are unsatisfiable.
+        """
+        if self.unsatisfiable:
+            return None
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.levels:
+                    self.unsatisfiable = True
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.enqueue(learned[0], learned)
+                self.increment /= 0.95
+            else:
+                literal = self.decide()
+                if literal is None:
+                    return {
+                        variable: self.assignment[variable] == 1
+                        for variable in range(1, self.count + 1)
+                    }
+                self.levels.append(len(self.trail))
+                self.enqueue(literal, None)
+
+
+def solve(count, clauses):
+    """
+    Returns a satisfying assignment for clauses over variables
+    1..count, or None if there is none.
+    """
+    return Solver(count, clauses).solve()
@@ -1,9 +1,9 @@
 import itertools
+import math
 import random
-import copy
+import time
+
 
-track1 = 0
-track2 = 0
 class Minesweeper():
     """
     Minesweeper game representation
@@ -86,54 +86,168 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def indices(mask):
+    """
+    Yields the index of each bit set in `mask`, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Timeout(Exception):
+    pass
+
+
+# Groups of frontier cells larger than this are not enumerated
+COMPONENT_LIMIT = 40
+
+# How many partial placements to try between checks of the clock
+CLOCK_INTERVAL = 256
+
+
+def convolve(a, b):
+    """
+    Returns the distribution of the total mines across two independent
+    parts, given each as a dict from a number of mines to a weight.
+    """
+    total = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            total[i + j] = total.get(i + j, 0) + x * y
+    return total
+
+
+def configurations(cells, sentences, deadline):
+    """
+    Enumerates every way of placing mines in `cells`, a list of bit
+    indices, that agrees with `sentences`. Returns a dict mapping each
+    possible number of mines to the number of placements with that many
+    and, for each cell, in how many of them it is a mine. Raises Timeout
+    once past `deadline`.
+    """
+    # For each cell, the sentences it is in; for each sentence, how many
+    # mines it still needs and how many of its cells are unassigned
+    constraints = [
+        [s for s, sentence in enumerate(sentences)
+         if sentence.cells >> cell & 1]
+        for cell in cells
+    ]
+    need = [sentence.count for sentence in sentences]
+    left = [len(sentence) for sentence in sentences]
+
+    results = {}
+    assignment = [0] * len(cells)
+    visited = 0
+
+    def visit(position, mines):
+        nonlocal visited
+        visited += 1
+        if visited % CLOCK_INTERVAL == 0 and time.perf_counter() > deadline:
+            raise Timeout
+        if position == len(cells):
+            entry = results.setdefault(mines, [0, [0] * len(cells)])
+            entry[0] += 1
+            for i, value in enumerate(assignment):
+                entry[1][i] += value
+            return
+        for value in (0, 1):
+            for s in constraints[position]:
+                need[s] -= value
+                left[s] -= 1
+            if all(0 <= need[s] <= left[s] for s in constraints[position]):
+                assignment[position] = value
+                visit(position + 1, mines + value)
+            for s in constraints[position]:
+                need[s] += value
+                left[s] += 1
+        assignment[position] = 0
+
+    visit(0, 0)
+    return results
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Cells are held as a bitmask with cell (i, j) at bit width * i + j.
+    Sentences are immutable and hashable, so marking a cell returns a
+    new sentence.
     """
 
+    __slots__ = ("cells", "count", "hash")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
-        self.count = count
+        object.__setattr__(self, "cells", cells)
+        object.__setattr__(self, "count", count)
+        object.__setattr__(self, "hash", hash((cells, count)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return self.hash
+
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(indices(self.cells))} = {self.count}"
+
+    def __len__(self):
+        return popcount(self.cells)
+
+    def issubset(self, other):
+        return self.cells & ~other.cells == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of `self` not in `other`,
+        where `other` is a subset of `self`.
+        """
+        return Sentence(self.cells & ~other.cells, self.count - other.count)
 
     def known_mines(self):
         """
-        Returns the set of all cells in self.cells known to be mines.
+        Returns the mask of all cells in self.cells known to be mines.
         """
-        if len(self.cells) == self.count:
+        if len(self) == self.count:
             return self.cells
-        return {}
+        return 0
 
     def known_safes(self):
         """
-        Returns the set of all cells in self.cells known to be safe.
+        Returns the mask of all cells in self.cells known to be safe.
         """
         if self.count == 0:
             return self.cells
-        return {}
+        return 0
 
-    def mark_mine(self, cell):
+    def mark_mine(self, index):
         """
-        Updates internal knowledge representation given the fact that
-        a cell is known to be a mine.
+        Returns the sentence given the fact that the cell at bit `index`
+        is known to be a mine.
         """
-        if cell in self.cells:
-            self.count -= 1
-            self.cells.remove(cell)
+        if self.cells >> index & 1:
+            return Sentence(self.cells & ~(1 << index), self.count - 1)
+        return self
 
-    def mark_safe(self, cell):
+    def mark_safe(self, index):
         """
-        Updates internal knowledge representation given the fact that
-        a cell is known to be safe.
+        Returns the sentence given the fact that the cell at bit `index`
+        is known to be safe.
         """
-        self.cells.discard(cell)
+        if self.cells >> index & 1:
+            return Sentence(self.cells & ~(1 << index), self.count)
+        return self
 
 
 class MinesweeperAI():
@@ -141,11 +255,14 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, budget=0.1):
 
-        # Set initial height and width
+        # Set initial height and width, the total number of mines, and
+        # how many seconds a guess may spend weighing up cells
         self.height = height
         self.width = width
+        self.total_mines = mines
+        self.budget = budget
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -154,8 +271,21 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, and the sentences
+        # mentioning each cell, by the cell's bit index
+        self.knowledge = set()
+        self.index = {}
+
+        # Sentences added or changed since inference last ran, and cells
+        # found to be safe (False) or mines (True) but not yet marked
+        self.pending = []
+        self.determined = []
+
+    def bit(self, cell):
+        return self.width * cell[0] + cell[1]
+
+    def cell(self, index):
+        return divmod(index, self.width)
 
     def mark_mine(self, cell):
         """
@@ -163,8 +293,9 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        index = self.bit(cell)
+        for sentence in self.take(index):
+            self.add_sentence(sentence.mark_mine(index))
 
     def mark_safe(self, cell):
         """
@@ -172,8 +303,46 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        index = self.bit(cell)
+        for sentence in self.take(index):
+            self.add_sentence(sentence.mark_safe(index))
+
+    def take(self, index):
+        """
+        Removes and returns every sentence mentioning the cell at bit
+        `index`.
+        """
+        sentences = self.index.pop(index, ())
+        for sentence in sentences:
+            self.knowledge.remove(sentence)
+            for other in indices(sentence.cells & ~(1 << index)):
+                self.index[other].discard(sentence)
+        return sentences
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for inference,
+        returning False if an equal sentence is already known. Sentences
+        that settle all their cells are not kept: the cells are queued
+        to be marked instead.
+        """
+        if not sentence.cells:
+            return False
+        mines = sentence.known_mines()
+        if mines or sentence.known_safes():
+            mine = bool(mines)
+            self.determined.extend(
+                (self.cell(index), mine) for index in indices(sentence.cells)
+            )
+            return True
+
+        if sentence in self.knowledge:
+            return False
+        self.knowledge.add(sentence)
+        for index in indices(sentence.cells):
+            self.index.setdefault(index, set()).add(sentence)
+        self.pending.append(sentence)
+        return True
 
     def add_knowledge(self, cell, count):
         """
@@ -193,7 +362,7 @@ class MinesweeperAI():
         self.moves_made.add(cell)
         self.mark_safe(cell)
 
-        knowledge_set = set()
+        cells = 0
         for i in range(cell[0] - 1, cell[0] + 2):
             for j in range(cell[1] - 1, cell[1] + 2):
                 if (i, j) == cell:
@@ -201,52 +370,49 @@ class MinesweeperAI():
 
                 if 0 <= i < self.height and 0 <= j < self.width:
                     if (i, j) not in self.safes and (i, j) not in self.mines:
-                        knowledge_set.add((i, j))
+                        cells |= 1 << self.bit((i, j))
                     elif (i, j) in self.mines:
                         count -= 1
-        self.knowledge.append(Sentence(knowledge_set, count))
-
-        # Mark new safe cells or mine cells
-        new_safe = []
-        new_mine = []
-        for sentence in self.knowledge:
-            if sentence.known_safes():
-                new_safe = copy.deepcopy(sentence.known_safes())
-            if sentence.known_mines():
-                new_mine = copy.deepcopy(sentence.known_mines())
-
-        for cell in new_safe:
-            self.mark_safe(cell)
-        for cell in new_mine:
-            self.mark_mine(cell)
-
-        # Infer new sentences
-        lookup = set()
-        global track1
-        global track2
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
-                track2 += 1
-                if ((tuple(sentence1.cells), tuple(sentence2.cells))) not in lookup:
-                    track1 += 1
-                    lookup.add((tuple(sentence1.cells), tuple(sentence2.cells)))
-                    if sentence1.cells < sentence2.cells:
-                        sentence2_copy = copy.deepcopy(sentence2)
-                        sentence2_copy.cells.difference_update(sentence1.cells)
-                        new_set = sentence2_copy.cells
-                        new_count = sentence2.count - sentence1.count
-                        if Sentence(new_set, new_count) not in self.knowledge:
-                            self.knowledge.append(Sentence(new_set, new_count))
-        print(track1, track2)
-# Check for duplicates
-        c_knowledge = []
-        for sentence in self.knowledge:
-            if sentence not in c_knowledge:
-                c_knowledge.append(sentence)
-        self.knowledge = c_knowledge
-        '''for sentence in self.knowledge:
-            if len(sentence.cells) == 0:
-                self.knowledge.remove(sentence)'''
+        self.add_sentence(Sentence(cells, count))
+        self.infer()
+
+    def infer(self):
+        """
+        Draws conclusions until there are no new ones: marks every cell
+        found to be safe or a mine, then for each pending sentence,
+        subtracts it from or subtracts from it any sentence sharing cells
+        with it that is a superset or subset of it.
+        """
+        while self.pending or self.determined:
+
+            # Mark new safe cells or mine cells first, since that shrinks
+            # the sentences left to compare
+            if self.determined:
+                cell, mine = self.determined.pop()
+                if cell in self.safes or cell in self.mines:
+                    continue
+                if mine:
+                    self.mark_mine(cell)
+                else:
+                    self.mark_safe(cell)
+                continue
+
+            sentence = self.pending.pop()
+
+            # Skip sentences changed again since they were queued
+            if sentence not in self.knowledge:
+                continue
+
+            # Infer new sentences from those sharing a cell with this one
+            neighbors = set()
+            for index in indices(sentence.cells):
+                neighbors.update(self.index[index])
+            neighbors.discard(sentence)
+            for other in neighbors:
+                if other.issubset(sentence):
+                    self.add_sentence(sentence.difference(other))
+                elif sentence.issubset(other):
+                    self.add_sentence(other.difference(sentence))
 
     def make_safe_move(self):
         """
@@ -267,16 +433,132 @@ class MinesweeperAI():
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking one of those least likely to be a mine.
         """
-        possible_moves = []
-        for i in range(self.height):
-            for j in range(self.width):
-                if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                    possible_moves.append((i, j))
-        try:
-            return random.choice(possible_moves)
-        except:
+        possible_moves = [
+            (i, j)
+            for i in range(self.height)
+            for j in range(self.width)
+            if (i, j) not in self.moves_made and (i, j) not in self.mines
+        ]
+        if not possible_moves:
             return None
+        risks = self.mine_probabilities(possible_moves)
+        lowest = min(risks.values())
+        return random.choice([
+            cell for cell in possible_moves if risks[cell] <= lowest + 1e-9
+        ])
+
+    def components(self):
+        """
+        Returns the knowledge split into groups of sentences where no two
+        groups share a cell, each with the mask of its cells.
+        """
+        groups = []
+        unseen = set(self.knowledge)
+        while unseen:
+            start = unseen.pop()
+            group = [start]
+            cells = 0
+            frontier = [start]
+            while frontier:
+                sentence = frontier.pop()
+                cells |= sentence.cells
+                for index in indices(sentence.cells):
+                    for other in self.index[index]:
+                        if other in unseen:
+                            unseen.remove(other)
+                            group.append(other)
+                            frontier.append(other)
+            groups.append((group, cells))
+        return groups
+
+    def mine_probabilities(self, cells):
+        """
+        Returns the chance that each of `cells` is a mine, taking every
+        placement of the remaining mines that agrees with the knowledge
+        to be equally likely.
+
+        Each group of sentences sharing cells is enumerated on its own,
+        then the groups are combined, weighting each total number of
+        mines by the ways to place the rest in cells no sentence mentions.
+        Groups too large to enumerate, or left when the time budget runs
+        out, fall back to the highest density of any sentence a cell is in.
+        """
+        deadline = time.perf_counter() + self.budget
+        probabilities = {}
+        exact = []
+        frontier = 0
+        for group, mask in self.components():
+            frontier |= mask
+            order = list(indices(mask))
+            try:
+                if len(order) > COMPONENT_LIMIT:
+                    raise Timeout
+                exact.append((order, configurations(order, group, deadline)))
+            except Timeout:
+                for index in order:
+                    probabilities[index] = max(
+                        sentence.count / len(sentence)
+                        for sentence in self.index[index]
+                    )
+
+        # Cells no sentence mentions share whatever mines are left over
+        for cell in self.safes:
+            probabilities[self.bit(cell)] = 0
+        interior = [
+            cell for cell in cells
+            if not frontier >> self.bit(cell) & 1 and cell not in self.safes
+        ]
+        unknown = len(interior)
+        remaining = self.total_mines - len(self.mines) - round(
+            sum(probabilities.values())
+        )
+
+        def fill(mines):
+            rest = remaining - mines
+            if rest < 0 or rest > unknown:
+                return 0
+            return math.comb(unknown, rest)
+
+        # Distribution of the mines in each group, and in all of them
+        counts = [
+            {mines: count for mines, (count, _) in results.items()}
+            for _, results in exact
+        ]
+        totals = {0: 1}
+        for distribution in counts:
+            totals = convolve(totals, distribution)
+        weight = sum(count * fill(mines) for mines, count in totals.items())
+        if weight == 0:
+            return {cell: probabilities.get(self.bit(cell), 0.5)
+                    for cell in cells}
+
+        for n, (order, results) in enumerate(exact):
+            others = {0: 1}
+            for m, distribution in enumerate(counts):
+                if m != n:
+                    others = convolve(others, distribution)
+            ways = {
+                mines: sum(count * fill(mines + extra)
+                           for extra, count in others.items())
+                for mines in results
+            }
+            for i, index in enumerate(order):
+                probabilities[index] = sum(
+                    per_cell[i] * ways[mines]
+                    for mines, (_, per_cell) in results.items()
+                ) / weight
+
+        if unknown:
+            expected = sum(
+                count * fill(mines) * (remaining - mines)
+                for mines, count in totals.items()
+            ) / weight
+            for cell in interior:
+                probabilities[self.bit(cell)] = expected / unknown
+
+        return {cell: probabilities[self.bit(cell)] for cell in cells}
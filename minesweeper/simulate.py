@@ -0,0 +1,124 @@
+"""
+Play seeded Minesweeper games with the AI, without a display
+
+Usage: python simulate.py [--games N] [--height H] [--width W]
+                          [--mines M | --density D] [--processes P]
+                          [--seed S] [--budget SECONDS]
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play(seed, height, width, mines, budget):
+    """
+    Plays one game seeded with `seed`, returning whether the AI won, and
+    how long each of its moves took to choose and learn from.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       budget=budget)
+    latencies = []
+    while True:
+
+        # Won once every safe cell is revealed, whether or not the AI
+        # has worked out where all the mines are
+        if len(ai.moves_made) == height * width - mines:
+            return True, latencies
+        started = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if game.is_mine(move):
+            latencies.append(time.perf_counter() - started)
+            return False, latencies
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - started)
+
+
+def play_many(seeds, height, width, mines, budget):
+    return [play(seed, height, width, mines, budget) for seed in seeds]
+
+
+def percentile(values, fraction):
+    """
+    Returns the value `fraction` of the way through sorted `values`.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run(games, height, width, mines, processes, seed, budget):
+    """
+    Plays `games` games across a process pool and prints the win rate,
+    moves per second and percentiles of the time per move.
+    """
+    seeds = range(seed, seed + games)
+    chunks = [seeds[i::processes * 4] for i in range(processes * 4)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [
+            pool.submit(play_many, chunk, height, width, mines, budget)
+            for chunk in chunks if chunk
+        ]
+        results = [
+            result for future in futures for result in future.result()
+        ]
+    elapsed = time.perf_counter() - started
+
+    wins = sum(won for won, _ in results)
+    latencies = sorted(
+        latency for _, game_latencies in results
+        for latency in game_latencies
+    )
+    thinking = sum(latencies)
+    print(f"{games} games on {height}x{width} with {mines} mines "
+          f"in {elapsed:.2f}s using {processes} processes")
+    print(f"win rate: {wins / games:.1%} ({wins}/{games})")
+    print(f"moves: {len(latencies)}, "
+          f"{len(latencies) / thinking if thinking else 0:.0f} moves/s "
+          f"of AI time per process")
+    if latencies:
+        print("latency ms: " + ", ".join(
+            f"p{fraction * 100:g} "
+            f"{percentile(latencies, fraction) * 1000:.3f}"
+            for fraction in (0.5, 0.9, 0.99, 0.999)
+        ) + f", max {latencies[-1] * 1000:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    count = parser.add_mutually_exclusive_group()
+    count.add_argument("--mines", type=int,
+                       help="number of mines (default 8)")
+    count.add_argument("--density", type=float,
+                       help="fraction of cells that are mines")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="worker processes to play games in")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; games use consecutive "
+                             "seeds")
+    parser.add_argument("--budget", type=float, default=0.1,
+                        help="seconds the AI may spend on each guess")
+    args = parser.parse_args()
+
+    if args.density is not None:
+        mines = round(args.density * args.height * args.width)
+    else:
+        mines = args.mines if args.mines is not None else 8
+    if not 0 <= mines < args.height * args.width:
+        parser.error("mines must leave at least one safe cell")
+    run(args.games, args.height, args.width, mines, args.processes,
+        args.seed, args.budget)
+
+
+if __name__ == "__main__":
+    main()
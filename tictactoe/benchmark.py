@@ -0,0 +1,87 @@
+"""
+Benchmark the Tic Tac Toe engines on a fixed suite of positions
+
+Usage: python benchmark.py [--profile]
+"""
+
+import cProfile
+import pstats
+import sys
+
+import tictactoe as ttt
+
+# Each position is written row by row, with "." for an empty cell,
+# along with the number in a row needed to win
+SUITE = [
+    ("...|...|...", 3),
+    ("X..|...|...", 3),
+    ("X..|.O.|...", 3),
+    ("X..|.O.|..X", 3),
+    ("XO.|.X.|..O", 3),
+    ("....|....|....|....", 3),
+    ("X...|.O..|....|....", 3),
+    ("....|....|....|....", 4),
+    (".....|.....|.....|.....|.....", 4),
+]
+
+# (name, search arguments) for each engine variant to compare
+ENGINES = [
+    ("book", {}),
+    ("alphabeta", {"use_book": False}),
+    ("engine", {"budget": 0.5}),
+]
+
+
+def parse(position):
+    return [
+        [ttt.EMPTY if cell == "." else cell for cell in row]
+        for row in position.split("|")
+    ]
+
+
+def run():
+    """
+    Searches every position with every engine that handles it and
+    prints one line per search.
+    """
+    print(f"{'engine':<10} {'position':<32} {'nodes':>8} {'hits':>6} "
+          f"{'cutoffs':>7} {'branch':>6} {'depth':>5} {'ms':>8} "
+          f"{'nodes/s':>10}")
+    totals = {}
+    for name, arguments in ENGINES:
+        for position, k in SUITE:
+            board = parse(position)
+            exact = len(board) == 3 and len(board[0]) == 3 and k == 3
+            if name != "engine" and not exact:
+                continue
+            _, stats = ttt.search(board, k, **arguments)
+
+            # Only iterative deepening has depths to report
+            depth = stats.depth_times[-1][0] if stats.depth_times else "-"
+            print(f"{stats.engine:<10} {position:<32} {stats.nodes:>8} "
+                  f"{stats.hits:>6} {stats.cutoffs:>7} "
+                  f"{stats.branching_factor():>6.2f} {depth:>5} "
+                  f"{stats.elapsed * 1000:>8.2f} "
+                  f"{stats.nodes_per_second():>10.0f}")
+            nodes, elapsed = totals.get(name, (0, 0.0))
+            totals[name] = (nodes + stats.nodes, elapsed + stats.elapsed)
+
+    print()
+    for name, (nodes, elapsed) in totals.items():
+        rate = nodes / elapsed if elapsed else 0.0
+        print(f"{name}: {nodes} nodes in {elapsed:.3f}s, {rate:.0f} nodes/s")
+
+
+def main():
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] != "--profile"):
+        sys.exit("Usage: python benchmark.py [--profile]")
+    if len(sys.argv) == 2:
+        profiler = cProfile.Profile()
+        profiler.runcall(run)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+    else:
+        run()
+
+
+if __name__ == "__main__":
+    main()
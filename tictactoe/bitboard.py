@@ -0,0 +1,159 @@
+"""
+Tic Tac Toe board as a pair of bitmasks
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Cell (i, j) is bit 3 * i + j of each player's mask
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL = (1 << CELLS) - 1
+
+WIN_MASKS = tuple(
+    sum(1 << (SIZE * i + j) for i, j in line)
+    for line in (
+        [[(i, j) for j in range(SIZE)] for i in range(SIZE)]
+        + [[(i, j) for i in range(SIZE)] for j in range(SIZE)]
+        + [[(i, i) for i in range(SIZE)]]
+        + [[(i, SIZE - 1 - i) for i in range(SIZE)]]
+    )
+)
+
+# Lookup tables indexed by a mask of cells: whether the cells contain a
+# winning line, how many cells are set, and which cells are still free
+WINS = tuple(
+    any(mask & line == line for line in WIN_MASKS)
+    for mask in range(FULL + 1)
+)
+COUNTS = tuple(bin(mask).count("1") for mask in range(FULL + 1))
+FREE = tuple(
+    tuple(cell for cell in range(CELLS) if not mask >> cell & 1)
+    for mask in range(FULL + 1)
+)
+
+# The 8 rotations and reflections of the board, each as a table mapping
+# a mask to its transformed mask
+TRANSFORMS = (
+    lambda i, j: (i, j),
+    lambda i, j: (j, SIZE - 1 - i),
+    lambda i, j: (SIZE - 1 - i, SIZE - 1 - j),
+    lambda i, j: (SIZE - 1 - j, i),
+    lambda i, j: (i, SIZE - 1 - j),
+    lambda i, j: (SIZE - 1 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (SIZE - 1 - j, SIZE - 1 - i),
+)
+SYMMETRIES = tuple(
+    tuple(
+        sum(1 << (SIZE * ti + tj)
+            for i in range(SIZE) for j in range(SIZE)
+            if mask >> (SIZE * i + j) & 1
+            for ti, tj in [transform(i, j)])
+        for mask in range(FULL + 1)
+    )
+    for transform in TRANSFORMS
+)
+
+
+def from_board(board):
+    """
+    Returns the (x, o) masks for a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (SIZE * i + j)
+            elif cell == O:
+                o |= 1 << (SIZE * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board for (x, o) masks.
+    """
+    board = []
+    for i in range(SIZE):
+        row = []
+        for j in range(SIZE):
+            bit = 1 << (SIZE * i + j)
+            row.append(X if x & bit else O if o & bit else EMPTY)
+        board.append(row)
+    return board
+
+
+def to_action(cell):
+    """
+    Returns the (i, j) action for a cell index.
+    """
+    return divmod(cell, SIZE)
+
+
+def to_cell(action):
+    """
+    Returns the cell index for an (i, j) action.
+    """
+    i, j = action
+    return SIZE * i + j
+
+
+def canonical(x, o):
+    """
+    Returns the same key for every rotation and reflection of a board.
+    """
+    return min((table[x], table[o]) for table in SYMMETRIES)
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return X if COUNTS[x] == COUNTS[o] else O
+
+
+def actions(x, o):
+    """
+    Returns a tuple of the free cell indices.
+    """
+    return FREE[x | o]
+
+
+def result(x, o, cell):
+    """
+    Returns the masks after the player to move takes `cell`.
+    """
+    if COUNTS[x] == COUNTS[o]:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINS[x] or WINS[o] or x | o == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
@@ -0,0 +1,121 @@
+"""
+Solved table of every reachable Tic Tac Toe position
+
+Run this file to (re)build book.bin. Each position maps to one 16-bit
+entry: bit 11 marks the position as present, bits 9-10 hold its value
+plus one, and bits 0-8 are the cells of its optimal moves.
+"""
+
+import os
+import sys
+from array import array
+
+import bitboard
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Positions are numbered in base 3, with X as 1 and O as 2 in each cell
+POSITIONS = 3 ** bitboard.CELLS
+TERNARY = tuple(
+    sum(3 ** cell for cell in range(bitboard.CELLS) if mask >> cell & 1)
+    for mask in range(bitboard.FULL + 1)
+)
+
+PRESENT = 1 << 11
+VALUE_SHIFT = 9
+MOVES_MASK = (1 << VALUE_SHIFT) - 1
+
+# The loaded table, read or built on first lookup
+book = None
+
+
+def index(x, o):
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def solve():
+    """
+    Returns the table for every non-terminal position reachable from the
+    empty board.
+    """
+    table = array("H", [0]) * POSITIONS
+    values = {}
+
+    def value(x, o):
+        if bitboard.terminal(x, o):
+            return bitboard.utility(x, o)
+        if (x, o) in values:
+            return values[(x, o)]
+
+        children = {
+            cell: value(*bitboard.result(x, o, cell))
+            for cell in bitboard.actions(x, o)
+        }
+        if bitboard.player(x, o) == bitboard.X:
+            v = max(children.values())
+        else:
+            v = min(children.values())
+        moves = sum(1 << cell for cell, child in children.items() if child == v)
+        table[index(x, o)] = PRESENT | (v + 1) << VALUE_SHIFT | moves
+        values[(x, o)] = v
+        return v
+
+    value(0, 0)
+    return table
+
+
+def save(table, filename=BOOK_FILE):
+    with open(f"{filename}.tmp", "wb") as f:
+        table.tofile(f)
+    os.replace(f"{filename}.tmp", filename)
+
+
+def load(filename=BOOK_FILE):
+    """
+    Returns the table stored in `filename`, or None if it is missing
+    or the wrong size.
+    """
+    table = array("H")
+    try:
+        with open(filename, "rb") as f:
+            table.fromfile(f, POSITIONS)
+            if f.read(1):
+                return None
+    except (OSError, EOFError):
+        return None
+    return table
+
+
+def get():
+    """
+    Returns the table, loading it from disk or else solving the game and
+    saving it for next time.
+    """
+    global book
+    if book is None:
+        table = load()
+        if table is None:
+            table = solve()
+            try:
+                save(table)
+            except OSError:
+                pass
+        book = table
+    return book
+
+
+def lookup(x, o):
+    """
+    Returns (value, optimal cells) for a position, or None if it is
+    terminal or cannot be reached in a game.
+    """
+    entry = get()[index(x, o)]
+    if not entry:
+        return None
+    moves = entry & MOVES_MASK
+    return ((entry >> VALUE_SHIFT & 3) - 1,
+            [cell for cell in range(bitboard.CELLS) if moves >> cell & 1])
+
+
+if __name__ == "__main__":
+    save(solve(), sys.argv[1] if len(sys.argv) > 1 else BOOK_FILE)
@@ -0,0 +1,310 @@
+"""
+Search engine for m x n boards with k in a row to win
+"""
+
+import time
+
+from stats import SearchStats
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position; heuristic scores always stay well below it
+WIN = 10 ** 9
+
+# Transposition table flags, as in tictactoe.py
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# How many nodes to search between checks of the clock
+CLOCK_INTERVAL = 1024
+
+
+class Timeout(Exception):
+    pass
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+class Game():
+    """
+    Rules of an m x n board where k marks in a row wins, on boards held
+    as a pair of bitmasks with cell (i, j) at bit cols * i + j.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        if not 0 < k <= max(rows, cols):
+            raise ValueError("k must fit on the board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # Every run of k cells in a row, column or diagonal
+        self.lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.lines.append(sum(
+                            1 << self.cell(i + di * step, j + dj * step)
+                            for step in range(k)
+                        ))
+        self.lines_through = [
+            [line for line in self.lines if line >> cell & 1]
+            for cell in range(self.cells)
+        ]
+
+        # Cells from the center outwards, the default move order
+        center_i = (rows - 1) / 2
+        center_j = (cols - 1) / 2
+        self.order = sorted(
+            range(self.cells),
+            key=lambda cell: (abs(cell // cols - center_i)
+                              + abs(cell % cols - center_j))
+        )
+
+        # Heuristic weight of a line holding n marks of only one player
+        self.weights = [0] + [4 ** n for n in range(k)]
+
+    def cell(self, i, j):
+        return self.cols * i + j
+
+    def action(self, cell):
+        return divmod(cell, self.cols)
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) masks for a list-of-lists board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, value in enumerate(row):
+                if value == X:
+                    x |= 1 << self.cell(i, j)
+                elif value == O:
+                    o |= 1 << self.cell(i, j)
+        return x, o
+
+    def to_board(self, x, o):
+        """
+        Returns the list-of-lists board for (x, o) masks.
+        """
+        return [
+            [X if x >> self.cell(i, j) & 1
+             else O if o >> self.cell(i, j) & 1
+             else EMPTY
+             for j in range(self.cols)]
+            for i in range(self.rows)
+        ]
+
+    def player(self, x, o):
+        return X if popcount(x) == popcount(o) else O
+
+    def actions(self, x, o):
+        """
+        Returns the free cells, center first.
+        """
+        taken = x | o
+        return [cell for cell in self.order if not taken >> cell & 1]
+
+    def result(self, x, o, cell):
+        if popcount(x) == popcount(o):
+            return x | 1 << cell, o
+        return x, o | 1 << cell
+
+    def wins(self, mask):
+        return any(mask & line == line for line in self.lines)
+
+    def wins_at(self, mask, cell):
+        """
+        Returns True if `mask` holds a full line through `cell`.
+        """
+        return any(mask & line == line for line in self.lines_through[cell])
+
+    def winner(self, x, o):
+        if self.wins(x):
+            return X
+        if self.wins(o):
+            return O
+        return None
+
+    def terminal(self, x, o):
+        return self.wins(x) or self.wins(o) or x | o == self.full
+
+    def evaluate(self, x, o):
+        """
+        Scores a position from X's point of view: WIN or -WIN if decided,
+        otherwise a sum over lines still open to only one player.
+        """
+        if self.wins(x):
+            return WIN
+        if self.wins(o):
+            return -WIN
+        score = 0
+        for line in self.lines:
+            if not line & o:
+                score += self.weights[popcount(line & x)]
+            elif not line & x:
+                score -= self.weights[popcount(line & o)]
+        return score
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta search with a time budget per move.
+    """
+
+    def __init__(self, game, budget=1.0, stats=None):
+        self.game = game
+        self.budget = budget
+        self.table = {}
+        self.stats = stats if stats is not None else SearchStats("engine")
+        self.deadline = None
+
+    def best_move(self, x, o):
+        """
+        Returns the best (i, j) action found within the time budget,
+        searching one ply deeper each round and keeping the result of
+        the last round that finished.
+        """
+        game = self.game
+        moves = game.actions(x, o)
+        if not moves:
+            self.stats.finish([], None)
+            return None
+        self.deadline = time.perf_counter() + self.budget
+        best = moves[0]
+        best_value = None
+        for depth in range(1, len(moves) + 1):
+            started = time.perf_counter()
+            try:
+                value, move = self.root(x, o, depth)
+            except Timeout:
+                break
+            self.stats.depth_times.append(
+                (depth, time.perf_counter() - started)
+            )
+            best, best_value = move, value
+            if abs(value) == WIN:
+                break
+        self.stats.finish([game.action(best)], best_value)
+        return game.action(best)
+
+    def root(self, x, o, depth):
+        game = self.game
+        maximizing = game.player(x, o) == X
+        best_value = -WIN - 1 if maximizing else WIN + 1
+        best_move = None
+        alpha, beta = -WIN - 1, WIN + 1
+        for cell in self.ordered(x, o):
+            value = self.value(*game.result(x, o, cell), depth - 1,
+                               alpha, beta)
+            if maximizing and value > best_value:
+                best_value, best_move = value, cell
+                alpha = max(alpha, value)
+            elif not maximizing and value < best_value:
+                best_value, best_move = value, cell
+                beta = min(beta, value)
+        self.table[(x, o)] = (best_value, EXACT, depth, best_move)
+        return best_value, best_move
+
+    def value(self, x, o, depth, alpha, beta):
+        """
+        Returns the alpha-beta value of a position searched `depth` plies
+        deep, with the heuristic evaluation at the horizon.
+        """
+        game = self.game
+        stats = self.stats
+        stats.nodes += 1
+        if stats.nodes % CLOCK_INTERVAL == 0 and (
+            time.perf_counter() > self.deadline
+        ):
+            raise Timeout
+
+        if depth == 0 or game.terminal(x, o):
+            return game.evaluate(x, o)
+
+        key = (x, o)
+        entry = self.table.get(key)
+        if entry is not None and entry[2] >= depth:
+            value, flag = entry[0], entry[1]
+            if flag == EXACT:
+                stats.hits += 1
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                stats.hits += 1
+                return value
+        stats.misses += 1
+        stats.expanded += 1
+
+        start_alpha, start_beta = alpha, beta
+        maximizing = game.player(x, o) == X
+        v = -WIN - 1 if maximizing else WIN + 1
+        best = None
+        for cell in self.ordered(x, o):
+            stats.children += 1
+            vtemp = self.value(*game.result(x, o, cell), depth - 1,
+                               alpha, beta)
+            if maximizing and vtemp > v:
+                v, best = vtemp, cell
+                alpha = max(alpha, v)
+            elif not maximizing and vtemp < v:
+                v, best = vtemp, cell
+                beta = min(beta, v)
+            if alpha >= beta:
+                stats.cutoffs += 1
+                break
+
+        if v <= start_alpha:
+            flag = UPPER
+        elif v >= start_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (v, flag, depth, best)
+        return v
+
+    def ordered(self, x, o):
+        """
+        Returns the free cells with the table's best move first, then
+        moves that win, then moves that block a win, then the rest from
+        the center outwards.
+        """
+        game = self.game
+        mine, theirs = (x, o) if game.player(x, o) == X else (o, x)
+        entry = self.table.get((x, o))
+        hint = entry[3] if entry is not None else None
+
+        def priority(cell):
+            if cell == hint:
+                return 0
+            if game.wins_at(mine | 1 << cell, cell):
+                return 1
+            if game.wins_at(theirs | 1 << cell, cell):
+                return 2
+            return 3
+
+        return sorted(game.actions(x, o), key=priority)
+
+
+def best_move(board, k=None, budget=1.0, stats=None):
+    """
+    Returns a good action (i, j) for the player to move on a board of
+    any size, where `k` in a row wins (by default the shorter side),
+    recording the search in `stats` if given.
+    """
+    rows, cols = len(board), len(board[0])
+    game = Game(rows, cols, k or min(rows, cols))
+    return Search(game, budget, stats).best_move(*game.from_board(board))
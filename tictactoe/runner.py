@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -17,14 +18,22 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Shortest time the computer appears to think before moving
+ai_delay = 0.5
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The AI searches on a worker thread so the window stays responsive;
+# ai_move holds the pending search, the board it was given and when
+ai_worker = ThreadPoolExecutor(max_workers=1)
+ai_move = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            ai_worker.shutdown(wait=False)
             sys.exit()
 
     screen.fill(black)
@@ -110,13 +119,15 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if ai_move is None:
+                ai_move = (ai_worker.submit(ttt.minimax, board), board,
+                           time.time())
             else:
-                ai_turn = True
+                future, searched, started = ai_move
+                if future.done() and time.time() - started >= ai_delay:
+                    if searched is board:
+                        board = ttt.result(board, future.result())
+                    ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +152,6 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai_move = None
 
     pygame.display.flip()
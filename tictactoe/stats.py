@@ -0,0 +1,66 @@
+"""
+Statistics collected while searching a game tree
+"""
+
+import time
+
+
+class SearchStats():
+    """
+    Counters for one search, filled in by whichever engine ran it.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.moves = []
+        self.value = None
+
+        # Positions visited, and internal positions expanded along with
+        # how many children they searched in total
+        self.nodes = 0
+        self.expanded = 0
+        self.children = 0
+
+        # Transposition table lookups that settled a position or not
+        self.hits = 0
+        self.misses = 0
+
+        # Alpha-beta cutoffs
+        self.cutoffs = 0
+
+        # (depth, seconds) for each completed deepening iteration; empty
+        # for searches that go straight to the end of the game
+        self.depth_times = []
+
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self, moves, value):
+        self.moves = moves
+        self.value = value
+        self.elapsed = time.perf_counter() - self.started
+
+    def branching_factor(self):
+        """
+        Returns the average number of children searched per expanded
+        position.
+        """
+        return self.children / self.expanded if self.expanded else 0.0
+
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "engine": self.engine,
+            "moves": self.moves,
+            "value": self.value,
+            "nodes": self.nodes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cutoffs": self.cutoffs,
+            "branching_factor": self.branching_factor(),
+            "depth_times": self.depth_times,
+            "elapsed": self.elapsed,
+            "nodes_per_second": self.nodes_per_second()
+        }
@@ -2,203 +2,283 @@
 Tic Tac Toe Player
 """
 
-import copy
+import functools
 import math
 from math import inf
 import random
 
+import bitboard
+import book
+import engine
+from stats import SearchStats
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Optional callable given the SearchStats of each search, in place of
+# printing diagnostics
+stats_hook = None
+
 
-def initial_state():
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
 
 
-def player(board):
-    if winner(board) is not None:
-        return "Terminal"
+def rules(board, k=None):
     """
-    Returns player who has the next turn on a board.
+    Returns the engine.Game for a board other than 3 x 3 with 3 in a
+    row, where `k` in a row wins (by default the shorter side), or None
+    for the standard game, which the bitboard tables handle.
     """
-    num_X = 0
-    num_O = 0
+    rows, cols = len(board), len(board[0])
+    if rows == 3 and cols == 3 and k in (None, 3):
+        return None
+    return make_game(rows, cols, k or min(rows, cols))
 
-    for row in board:
-        for cell in row:
-            if cell == X:
-                num_X += 1
-            elif cell == O:
-                num_O += 1
 
-    if num_X == num_O:
-        return X
-    elif num_X > num_O:
-        return O
-    raise NotImplementedError
+@functools.lru_cache(maxsize=None)
+def make_game(rows, cols, k):
+    return engine.Game(rows, cols, k)
 
 
-def actions(board):
+def player(board, k=None):
     """
-    Returns set of all possible actions (i, j) available on the board.
+    Returns player who has the next turn on a board.
     """
-    if winner(board) is not None:
+    game = rules(board, k)
+    if game is None:
+        x, o = bitboard.from_board(board)
+        if bitboard.winner(x, o) is not None:
+            return "Terminal"
+        return bitboard.player(x, o)
+    x, o = game.from_board(board)
+    if game.winner(x, o) is not None:
         return "Terminal"
+    return game.player(x, o)
 
-    moves = []
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == EMPTY:
-                moves.append([i,j])
-    return moves
+
+def actions(board, k=None):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    game = rules(board, k)
+    if game is None:
+        x, o = bitboard.from_board(board)
+        if bitboard.winner(x, o) is not None:
+            return "Terminal"
+        return [bitboard.to_action(cell) for cell in bitboard.actions(x, o)]
+    x, o = game.from_board(board)
+    if game.winner(x, o) is not None:
+        return "Terminal"
+    return [game.action(cell) for cell in game.actions(x, o)]
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    i, j = action
-    newboard = copy.deepcopy(board)
-    newboard[i][j] = player(newboard)
-    return newboard
+    game = rules(board)
+    if game is None:
+        x, o = bitboard.from_board(board)
+        return bitboard.to_board(
+            *bitboard.result(x, o, bitboard.to_cell(action))
+        )
+    x, o = game.from_board(board)
+    return game.to_board(*game.result(x, o, game.cell(*action)))
 
 
-def winner(board):
+def winner(board, k=None):
     """
     Returns the winner of the game, if there is one.
     """
-    #Horizontal
-    for row in board:
-        if check_same(row):
-            return row[0]
-    #Vertical
-    for i in range(len(board)):
-        column = []
-        for row in board:
-            column.append(row[i])
-        if check_same(column):
-            return column[0]
-    #Diagonal
-    i = len(board) - 1
-    j = 0
-    l_diagonal = []
-    r_diagonal = []
-    for row in board:
-        l_diagonal.append(row[j])
-        j += 1
-        r_diagonal.append(row[i])
-        i -= 1
-    if check_same(l_diagonal):
-        return l_diagonal[0]
-    if check_same(r_diagonal):
-        return r_diagonal[0]
-
-    return None
-
-def check_same(lst):
-    if all(ele == X for ele in lst) or all(ele == O for ele in lst):
-        return True
-    else:
-        return False
+    game = rules(board, k)
+    if game is None:
+        return bitboard.winner(*bitboard.from_board(board))
+    return game.winner(*game.from_board(board))
 
-def terminal(board):
+
+def terminal(board, k=None):
     """
     Returns True if game is over, False otherwise.
     """
-    #Check for 3 in a row
-    if winner(board) is not None:
-        return True
-    #Check if full
-    for row in board:
-        for cell in row:
-            if cell == EMPTY:
-                return False
-    return True
+    game = rules(board, k)
+    if game is None:
+        return bitboard.terminal(*bitboard.from_board(board))
+    return game.terminal(*game.from_board(board))
 
 
-def utility(board):
+def utility(board, k=None):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    game = rules(board, k)
+    if game is None:
+        return bitboard.utility(*bitboard.from_board(board))
+    return {X: 1, O: -1, None: 0}[game.winner(*game.from_board(board))]
 
 
-def minimax(board):
+def minimax(board, k=None, budget=None):
     """
     Returns the optimal action for the current player on the board.
+
+    Other board sizes, other values of `k` in a row, or a time `budget`
+    in seconds go to the iterative-deepening engine, which returns the
+    best action it finds in time.
+    """
+    action, stats = search(board, k, budget)
+    return action
+
+
+def search(board, k=None, budget=None, use_book=True):
+    """
+    Returns the action minimax would play along with the SearchStats of
+    the search that chose it.
+    """
+    if len(board) != 3 or len(board[0]) != 3 or k not in (None, 3) or budget is not None:
+        stats = SearchStats("engine")
+        action = engine.best_move(board, k, budget or 1.0, stats)
+        report(stats)
+        return action, stats
+
+    state = bitboard.from_board(board)
+    entry = book.lookup(*state) if use_book else None
+    if entry is not None:
+        stats = SearchStats("book")
+        stats.hits = 1
+        v, cells = entry
+        optimal_moves = [bitboard.to_action(cell) for cell in cells]
+        stats.finish(optimal_moves, v)
+        report(stats)
+        return random.choice(optimal_moves), stats
+
+    # Positions missing from the book cannot arise in a game, but can
+    # still be searched
+    stats = SearchStats("alphabeta")
+    table = {}
+    optimal_moves = []
+    if bitboard.player(*state) == X:
+        v = max_value(state, -inf, inf, stats, table)
+
+        # A move is optimal if its value reaches v, which a null-window
+        # search around v decides using the values already in the table
+        for cell in bitboard.actions(*state):
+            vtemp = min_value(bitboard.result(*state, cell), v - 1, v, stats, table)
+            if vtemp >= v:
+                optimal_moves.append(bitboard.to_action(cell))
+
+    if bitboard.player(*state) == O:
+        v = min_value(state, -inf, inf, stats, table)
+        for cell in bitboard.actions(*state):
+            vtemp = max_value(bitboard.result(*state, cell), v, v + 1, stats, table)
+            if vtemp <= v:
+                optimal_moves.append(bitboard.to_action(cell))
+    stats.finish(optimal_moves, v)
+    report(stats)
+    return random.choice(optimal_moves), stats
+
+
+def report(stats):
+    if stats_hook is not None:
+        stats_hook(stats)
+
+
+# Transposition table flags: the stored value is exact, or only a lower
+# or upper bound because the search that produced it was cut off
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+def probe(table, key, alpha, beta):
+    """
+    Returns the stored value if it settles the search of `key` within
+    (alpha, beta), else None along with the narrowed window.
+    """
+    entry = table.get(key)
+    if entry is None:
+        return None, alpha, beta
+    value, flag, depth = entry
+    if flag == EXACT:
+        return value, alpha, beta
+    if flag == LOWER:
+        alpha = max(alpha, value)
+    else:
+        beta = min(beta, value)
+    if alpha >= beta:
+        return value, alpha, beta
+    return None, alpha, beta
+
+
+def store(table, key, v, alpha, beta, depth):
     """
-    dict = {}
-    if player(board) == X:
-        v, count = max_value(board, -inf, inf, 0, dict)
-        optimal_moves = []
-        for action in actions(board):
-            vtemp, count2 = min_value(result(board, action), -inf, inf, 0, dict)
-            if v == vtemp:
-                optimal_moves.append(action)
-
-    if player(board) == O:
-        v, count = min_value(board, -inf, inf, 0, dict)
-        optimal_moves = []
-        for action in actions(board):
-            vtemp, count2 = max_value(result(board,action), -inf, inf, 0, dict)
-            if v == vtemp:
-                optimal_moves.append(action)
-    print(optimal_moves)
-    print(v)
-    print(count)
-    return random.choice(optimal_moves)
-
-def min_value(board, alpha, beta, count, dict):
-    key = convert(board)
-    if terminal(board):
-        return utility(board), count+1
-    if key not in dict:
-        v = inf
-
-        for action in actions(board):
-            vtemp, count = max_value(result(board, action), alpha, beta, count, dict)
-            v = min(v, vtemp)
-            beta = min(beta, v)
-            #if alpha >= beta:
-                #break
-
-        dict[key] = v
-    return dict[key], count+1
-
-def max_value(board, alpha, beta, count, dict):
-    key = convert(board)
-    if terminal(board):
-        return utility(board), count+1
-    if key not in dict:
-        v = -inf
-
-        for action in actions(board):
-            vtemp, count = min_value(result(board, action), alpha, beta, count, dict)
-            v = max(v, vtemp)
-            alpha = max(alpha, v)
-            #if alpha >= beta:
-               # break
-
-        dict[key] = v
-    return dict[key], count+1
-
-def convert(board):
-    board_tuple = []
-    for row in board:
-        board_tuple.append(tuple(row))
-    return tuple(board_tuple)
-
-print(minimax([[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]))
\ No newline at end of file
+    Records v for `key`, flagged by where it fell in the (alpha, beta)
+    window the search started with.
+    """
+    if v <= alpha:
+        flag = UPPER
+    elif v >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    table[key] = (v, flag, depth)
+
+
+def min_value(state, alpha, beta, stats, table):
+    stats.nodes += 1
+    if bitboard.terminal(*state):
+        return bitboard.utility(*state)
+    key = bitboard.canonical(*state)
+    value, alpha, beta = probe(table, key, alpha, beta)
+    if value is not None:
+        stats.hits += 1
+        return value
+    stats.misses += 1
+    stats.expanded += 1
+
+    start_alpha, start_beta = alpha, beta
+    v = inf
+    moves = bitboard.actions(*state)
+    for cell in moves:
+        stats.children += 1
+        vtemp = max_value(bitboard.result(*state, cell), alpha, beta, stats, table)
+        v = min(v, vtemp)
+        beta = min(beta, v)
+        if alpha >= beta:
+            stats.cutoffs += 1
+            break
+
+    store(table, key, v, start_alpha, start_beta, len(moves))
+    return v
+
+
+def max_value(state, alpha, beta, stats, table):
+    stats.nodes += 1
+    if bitboard.terminal(*state):
+        return bitboard.utility(*state)
+    key = bitboard.canonical(*state)
+    value, alpha, beta = probe(table, key, alpha, beta)
+    if value is not None:
+        stats.hits += 1
+        return value
+    stats.misses += 1
+    stats.expanded += 1
+
+    start_alpha, start_beta = alpha, beta
+    v = -inf
+    moves = bitboard.actions(*state)
+    for cell in moves:
+        stats.children += 1
+        vtemp = min_value(bitboard.result(*state, cell), alpha, beta, stats, table)
+        v = max(v, vtemp)
+        alpha = max(alpha, v)
+        if alpha >= beta:
+            stats.cutoffs += 1
+            break
+
+    store(table, key, v, start_alpha, start_beta, len(moves))
+    return v
+